@@ -0,0 +1,105 @@
+import os
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DYNAMIC_MAX_RENDERS = int(os.getenv("DYNAMIC_MAX_RENDERS", os.getenv("BROWSER_POOL_SIZE", "2")))
+DYNAMIC_MAX_QUEUE = int(os.getenv("DYNAMIC_MAX_QUEUE", "20"))
+# Starting guess for a render's duration, refined from observed renders
+DYNAMIC_EXPECTED_RENDER_SECONDS = float(os.getenv("DYNAMIC_EXPECTED_RENDER_SECONDS", "5"))
+
+_DECAY = 0.2
+
+
+class Overloaded(Exception):
+    """A render was refused at admission; the client should come back after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    """
+    Process-wide limit on concurrent headless renders, with a bounded wait queue.
+
+    A request is admitted only if it can plausibly finish within its own timeout: the
+    expected queue wait (from the running average render time) plus one render must fit.
+    Otherwise it is refused at once, so overload turns into fast 503s instead of a pile
+    of browsers. Request threads block here, before anything is handed to the browser pool.
+    """
+
+    def __init__(self, max_concurrent: int = DYNAMIC_MAX_RENDERS, max_queue: int = DYNAMIC_MAX_QUEUE,
+                 expected_duration: float = DYNAMIC_EXPECTED_RENDER_SECONDS):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.avg_duration = expected_duration
+        self.running = 0
+        self.queued = 0
+        self._cond = threading.Condition()
+
+    def _expected_wait(self, position: int) -> float:
+        """Seconds until a request at queue `position` (0 = next) gets a slot."""
+        if self.running < self.max_concurrent:
+            return 0.0
+        return (position // self.max_concurrent + 1) * self.avg_duration
+
+    @contextmanager
+    def admit(self, timeout: float):
+        """
+        Hold a render slot for the duration of the block, or raise Overloaded.
+        The block receives the request's deadline (time.monotonic() based): the render itself
+        must not outlive it.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self.running >= self.max_concurrent:
+                if self.queued >= self.max_queue:
+                    raise Overloaded("Render queue is full", self._expected_wait(self.queued))
+                expected = self._expected_wait(self.queued)
+                if expected + self.avg_duration > timeout:
+                    raise Overloaded(f"Render would not finish within {timeout}s "
+                                     f"(expected wait {expected:.0f}s)", expected)
+                self.queued += 1
+                try:
+                    # Give up once the remaining time could no longer cover a render
+                    while self.running >= self.max_concurrent:
+                        remaining = deadline - time.monotonic() - self.avg_duration
+                        if remaining <= 0 or not self._cond.wait(remaining):
+                            if self.running >= self.max_concurrent:
+                                raise Overloaded(f"No render slot freed up within {timeout}s",
+                                                 self._expected_wait(self.queued))
+                finally:
+                    self.queued -= 1
+            self.running += 1
+
+        started = time.monotonic()
+        try:
+            yield deadline
+        finally:
+            with self._cond:
+                self.running -= 1
+                self.avg_duration += _DECAY * ((time.monotonic() - started) - self.avg_duration)
+                self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "running": self.running,
+                "queued": self.queued,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "avg_render_seconds": round(self.avg_duration, 2)
+            }
+
+
+def remaining(deadline: float) -> float:
+    """Seconds left until an admitted request's deadline, never negative."""
+    return max(0.0, deadline - time.monotonic())
+
+
+render_admission = AdmissionController()
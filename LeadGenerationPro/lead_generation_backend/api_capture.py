@@ -0,0 +1,93 @@
+import re
+import time
+import logging
+from typing import Any, Dict, List
+import aiohttp
+from models import ApiBinding
+from utils import get_http_session, jsonpath_values, jsonpath_first, is_proxy_failure, fetch_error
+from robots import polite_wait
+from proxy_pool import proxy_pool
+from retry import call_with_retries, RetryableError, RETRYABLE_STATUSES, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+def find_item_arrays(data: Any, path: str = "$", found: List[dict] = None) -> List[dict]:
+    """Locate arrays of objects inside a JSON document - the likely row lists of an API."""
+    if found is None:
+        found = []
+    if isinstance(data, list):
+        objects = [item for item in data if isinstance(item, dict)]
+        if objects:
+            found.append({
+                "items_path": f"{path}[*]",
+                "count": len(data),
+                "sample_keys": sorted(objects[0].keys())[:30]
+            })
+            find_item_arrays(objects[0], f"{path}[0]", found)
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            child = f"{path}.{key}" if re.fullmatch(r"[A-Za-z_][\w-]*", key) else f"{path}['{key}']"
+            find_item_arrays(value, child, found)
+    return found
+
+
+def rows_from_json(data: Any, binding: ApiBinding, max_items: int = None) -> List[Dict[str, Any]]:
+    """Turn an API payload into rows using the binding's items path and field paths."""
+    items = jsonpath_values(data, binding.items_path)
+    if max_items:
+        items = items[:max_items]
+
+    rows = []
+    for i, item in enumerate(items, 1):
+        row = {"index": i}
+        for field_name, field_path in binding.field_paths.items():
+            row[field_name] = jsonpath_first(item, field_path)
+        if any(v for k, v in row.items() if k != "index" and v):
+            rows.append(row)
+    return rows
+
+
+async def fetch_api_rows(binding: ApiBinding, timeout: int = 15, max_items: int = None) -> List[Dict[str, Any]]:
+    """
+    Call a bound JSON endpoint directly over the pooled HTTP session - no browser involved.
+    Goes through robots.txt, the per-host rate limit, the proxy pool and retries like fetch_html.
+    """
+    session = get_http_session()
+    url = str(binding.endpoint)
+    # Captured form-encoded bodies are kept as raw text and replayed as such
+    body = {"data": binding.body} if isinstance(binding.body, str) else {"json": binding.body}
+
+    async def attempt():
+        await polite_wait(url, session)
+        proxy = proxy_pool.acquire(url)
+        started = time.monotonic()
+        try:
+            async with session.request(
+                binding.method.upper(),
+                url,
+                headers=binding.headers or None,
+                **body,
+                proxy=proxy.url if proxy else None,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if response.status in RETRYABLE_STATUSES:
+                    raise RetryableError(
+                        f"{response.status} {response.reason}",
+                        parse_retry_after(response.headers.get("Retry-After"))
+                    )
+                response.raise_for_status()
+                payload = await response.json(content_type=None)
+        except Exception as e:
+            if is_proxy_failure(e):
+                proxy_pool.record_failure(proxy)
+            raise
+        proxy_pool.record_success(proxy, time.monotonic() - started)
+        return payload
+
+    try:
+        data = await call_with_retries(url, attempt)
+    except Exception as e:
+        raise fetch_error(e, timeout, "Failed to call API endpoint") from e
+
+    return rows_from_json(data, binding, max_items)
@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+from data_dir import data_path
+
+logger = logging.getLogger(__name__)
+
+# Resource types worth caching: identical across template pages of one site
+CACHEABLE_TYPES = {"script", "stylesheet", "font", "image"}
+# Headers that describe the wire encoding, not the decoded body we keep
+_WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+# Cookies belong to the response that set them and are never replayed from the cache
+_DROPPED_HEADERS = _WIRE_HEADERS | {"set-cookie"}
+_MAX_AGE = re.compile(r"(?:s-maxage|max-age)\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def freshness(headers: dict, default_ttl: int) -> int:
+    """
+    Seconds a response may be reused, from Cache-Control / Expires. 0 means don't store.
+    Validator-only responses (ETag / Last-Modified) get `default_ttl`, like a browser heuristic.
+    """
+    cache_control = (headers.get("cache-control") or "").lower()
+    # no-cache requires revalidation on every use, whatever max-age says; the cache can't
+    # revalidate, so such responses are not stored
+    if "no-store" in cache_control or "private" in cache_control or "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return int(match.group(1))
+    expires = headers.get("expires")
+    if expires:
+        try:
+            return max(0, int(parsedate_to_datetime(expires).timestamp() - time.time()))
+        except (TypeError, ValueError):
+            return 0
+    if headers.get("etag") or headers.get("last-modified"):
+        return default_ttl
+    return 0
+
+
+class AssetCache:
+    """
+    Static assets (JS, CSS, fonts, images) served to the browsers by route interception.
+
+    An in-memory LRU bounded by total bytes, plus an optional on-disk tier that survives
+    restarts and is shared by workers on the same host - same layout as the result cache.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entry_bytes: int = 5 * 1024 * 1024,
+                 default_ttl: int = 3600, disk_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.default_ttl = default_ttl
+        self.disk_dir = disk_dir
+        self._memory = OrderedDict()   # url -> (expires_at, status, headers, body)
+        self._size = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, url: str) -> str:
+        return os.path.join(self.disk_dir, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def get(self, url: str) -> Optional[Tuple[int, dict, bytes]]:
+        """(status, headers, body) of a fresh cached asset, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(url)
+                    return entry[1:]
+                self._drop(url)
+
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(url)
+        try:
+            with open(f"{path}.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["expires_at"] <= now:
+                return None
+            with open(f"{path}.bin", "rb") as f:
+                body = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        self._remember(url, meta["expires_at"], meta["status"], meta["headers"], body)
+        return meta["status"], meta["headers"], body
+
+    def put(self, url: str, status: int, headers: dict, body: bytes) -> bool:
+        """Store an asset if its headers allow reuse; returns whether it was stored."""
+        headers = {k.lower(): v for k, v in headers.items()}
+        ttl = freshness(headers, self.default_ttl)
+        if status != 200 or ttl <= 0 or len(body) > self.max_entry_bytes:
+            return False
+        headers = {k: v for k, v in headers.items() if k not in _DROPPED_HEADERS}
+        expires_at = time.time() + ttl
+        self._remember(url, expires_at, status, headers, body)
+        if self.disk_dir:
+            path = self._disk_path(url)
+            meta = {"expires_at": expires_at, "status": status, "headers": headers}
+            try:
+                # Body first, metadata last: a reader only trusts an entry once its .json exists
+                self._write(f"{path}.bin", body)
+                self._write(f"{path}.json", json.dumps(meta).encode("utf-8"))
+            except OSError as e:
+                logger.warning(f"Could not write asset cache entry: {e}")
+        return True
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _remember(self, url: str, expires_at: float, status: int, headers: dict, body: bytes):
+        with self._lock:
+            self._drop(url)
+            self._memory[url] = (expires_at, status, headers, body)
+            self._size += len(body)
+            while self._size > self.max_bytes and self._memory:
+                self._drop(next(iter(self._memory)))
+
+    def _drop(self, url: str):
+        entry = self._memory.pop(url, None)
+        if entry is not None:
+            self._size -= len(entry[3])
+
+
+asset_cache = AssetCache(
+    max_bytes=int(os.getenv("ASSET_CACHE_BYTES", str(64 * 1024 * 1024))),
+    default_ttl=int(os.getenv("ASSET_CACHE_DEFAULT_TTL", "3600")),
+    disk_dir=data_path(os.getenv("ASSET_CACHE_DIR")) if os.getenv("ASSET_CACHE_DIR") else None
+)
+
+
+_routed_contexts = weakref.WeakSet()
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(str(url))
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def asset_route_hook(page_url: str, cache: AssetCache = asset_cache):
+    """
+    crawl4ai `on_page_context_created` hook that intercepts the context's requests and serves
+    same-origin static assets from the shared cache, fetching and storing them on a miss.
+    """
+    origin = _origin(page_url)
+
+    async def handle(route):
+        request = route.request
+        if (request.method != "GET" or request.resource_type not in CACHEABLE_TYPES
+                or _origin(request.url) != origin):
+            await route.continue_()
+            return
+        cached = cache.get(request.url)
+        if cached is not None:
+            status, headers, body = cached
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            await route.continue_()
+            return
+        cache.put(request.url, response.status, response.headers, body)
+        # The body is already decoded, so the wire-encoding headers must not be replayed
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _WIRE_HEADERS}
+        await route.fulfill(status=response.status, headers=headers, body=body)
+
+    async def on_page_context_created(page, context, **kwargs):
+        # Pooled browsers reuse contexts; route each one only once
+        if context not in _routed_contexts:
+            _routed_contexts.add(context)
+            await context.route("**/*", handle)
+        return page
+
+    return on_page_context_created
@@ -0,0 +1,67 @@
+"""
+Serialization benchmark for large scrape responses.
+
+Compares the old path (validated ScrapeResponse returned through response_model, std json)
+with the trusted path (model_construct + fast_json.json_response) per 10k rows, end to end
+through a FastAPI test client. Run from this directory: python bench_serialization.py
+"""
+import time
+from datetime import datetime
+from statistics import median
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from models import ScrapeResponse
+from fast_json import json_response, orjson
+
+ROWS = 10_000
+REPEAT = 5
+
+
+def make_rows(n: int) -> list:
+    return [{
+        "index": i,
+        "company_name": f"Company {i}",
+        "company_link": f"https://example.com/companies/{i}",
+        "address": f"{i} Main Street, Springfield",
+        "phone": f"+1-555-{i:06d}",
+        "description": "Business networking and lead generation services " * 2
+    } for i in range(n)]
+
+
+ROWS_DATA = make_rows(ROWS)
+app = FastAPI()
+
+
+@app.get("/before", response_model=ScrapeResponse)
+def before():
+    return ScrapeResponse(entity_name="bench", url="https://example.com", scraped_at=datetime.now(),
+                          total_items=ROWS, data=ROWS_DATA, success=True, message="ok")
+
+
+@app.get("/after", response_model=ScrapeResponse)
+def after(http_request: Request):
+    response = ScrapeResponse.model_construct(entity_name="bench", url="https://example.com",
+                                              scraped_at=datetime.now(), total_items=ROWS, data=ROWS_DATA,
+                                              success=True, message="ok")
+    return json_response(response, http_request)
+
+
+def bench(client: TestClient, path: str, encoding: str) -> tuple:
+    timings, size = [], 0
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        response = client.get(path, headers={"Accept-Encoding": encoding})
+        timings.append(time.perf_counter() - started)
+        size = int(response.headers.get("content-length", len(response.content)))
+    return median(timings) * 1000, size
+
+
+if __name__ == "__main__":
+    client = TestClient(app)
+    print(f"{ROWS} rows, median of {REPEAT} (orjson {'on' if orjson else 'off'})")
+    for label, path, encoding in (("before", "/before", "identity"),
+                                  ("after", "/after", "identity"),
+                                  ("after+gzip", "/after", "gzip"),
+                                  ("after+br", "/after", "br")):
+        ms, size = bench(client, path, encoding)
+        print(f"{label:<12} {ms:8.1f} ms  {size / 1024:8.0f} KiB on the wire")
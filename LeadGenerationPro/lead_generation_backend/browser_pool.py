@@ -0,0 +1,313 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, List, Optional, Set, TypeVar
+from urllib.parse import urlsplit
+from crawl4ai import AsyncWebCrawler, BrowserConfig
+from browser_state import load_state
+from utils import close_http_session
+
+# Optional: per-browser memory tracking needs psutil; without it browsers recycle on page count and age
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "100"))             # renders before a browser is recycled
+BROWSER_MAX_RSS_MB = int(os.getenv("BROWSER_MAX_RSS_MB", "1024"))          # browser + renderer processes
+BROWSER_MAX_AGE = int(os.getenv("BROWSER_MAX_AGE", "3600"))                # seconds
+BROWSER_IDLE_TIMEOUT = int(os.getenv("BROWSER_IDLE_TIMEOUT", "300"))
+BROWSER_WATCHDOG_INTERVAL = int(os.getenv("BROWSER_WATCHDOG_INTERVAL", "30"))
+BROWSER_CRASH_RETRIES = int(os.getenv("BROWSER_CRASH_RETRIES", "1"))
+BROWSER_RENDER_TIMEOUT = int(os.getenv("BROWSER_RENDER_TIMEOUT", "120"))   # seconds a run() may take
+
+# Playwright's messages for a target or browser that died under us ("Target closed",
+# "Target page, context or browser has been closed", "browser.newPage: Browser closed", ...).
+# Site errors and network failures must not match: they would recycle a healthy browser.
+_CRASH_MARKERS = ("target closed", "target page, context or browser has been closed",
+                  "browser has been closed", "browser closed", "page crashed")
+
+
+class BrowserCrashed(Exception):
+    """The browser (or its tab) died during a render; the scrape is retried on a fresh instance."""
+
+
+class RenderTimeout(TimeoutError):
+    """A run() did not finish in time; it was cancelled and its browser recycled."""
+
+
+def is_browser_crash(error) -> bool:
+    message = str(error or "").lower()
+    return any(marker in message for marker in _CRASH_MARKERS)
+
+
+class PooledBrowser:
+    """A started crawler plus what the watchdog needs to decide when to recycle it."""
+
+    def __init__(self, key: tuple, crawler: AsyncWebCrawler, pids: Set[int]):
+        self.key = key
+        self.crawler = crawler
+        self.pids = pids
+        self.started_at = time.monotonic()
+        self.last_used = self.started_at
+        self.pages_served = 0
+        self.busy = False
+        self.retire = False
+
+    def rss_mb(self) -> Optional[float]:
+        """Resident memory of the browser's process tree, if psutil can see it."""
+        if psutil is None or not self.pids:
+            return None
+        total = 0
+        for pid in self.pids:
+            try:
+                process = psutil.Process(pid)
+                for p in [process] + process.children(recursive=True):
+                    total += p.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total / (1024 * 1024)
+
+    def worn_out(self) -> Optional[str]:
+        """Why the browser should be recycled, or None while it is healthy."""
+        if self.pages_served >= BROWSER_MAX_PAGES:
+            return f"{self.pages_served} pages served"
+        if time.monotonic() - self.started_at >= BROWSER_MAX_AGE:
+            return "max age reached"
+        rss = self.rss_mb()
+        if rss is not None and rss >= BROWSER_MAX_RSS_MB:
+            return f"RSS {rss:.0f} MB"
+        return None
+
+    def as_dict(self) -> dict:
+        rss = self.rss_mb()
+        return {
+            "site": self.key[1],
+            "proxy": self.key[0],
+            "pages_served": self.pages_served,
+            "age_seconds": round(time.monotonic() - self.started_at),
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "busy": self.busy
+        }
+
+
+class BrowserPool:
+    """
+    Long-lived crawl4ai browsers for dynamic scrapes.
+
+    The browsers live on one dedicated event loop thread (Playwright objects are bound to
+    the loop that created them), so the request threads hand their work over with run().
+    A browser is keyed by (proxy, site): it was launched with that proxy and with the site's
+    saved storage state, and renders of the same site keep reusing it. A watchdog recycles
+    browsers past their page, age or memory limits; a scrape whose browser crashes is
+    retried on a fresh one.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE):
+        self.size = max(1, size)
+        self._browsers: List[PooledBrowser] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._available: Optional[asyncio.Condition] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+
+    # -- worker loop -------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+                self._thread.start()
+                asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+            return self._loop
+
+    async def _setup(self):
+        self._available = asyncio.Condition()
+        self._launch_lock = asyncio.Lock()
+        asyncio.ensure_future(self._watchdog())
+
+    def run(self, coroutine: Awaitable[T], timeout: Optional[float] = BROWSER_RENDER_TIMEOUT) -> T:
+        """
+        Run a coroutine on the pool's loop from a request thread and wait for its result.
+        Past `timeout` the coroutine is cancelled, which recycles the browser it was holding
+        (see browser()), and RenderTimeout is raised; a hung page never pins the thread.
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise RenderTimeout(f"Render did not finish within {timeout}s")
+
+    def shutdown(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_all(), self._loop).result(30)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
+        self._loop = None
+
+    async def _close_all(self):
+        for browser in list(self._browsers):
+            await self._close(browser, "shutdown")
+        await close_http_session()
+
+    # -- browsers ----------------------------------------------------------------------
+
+    @staticmethod
+    def _child_pids() -> Set[int]:
+        if psutil is None:
+            return set()
+        return {p.pid for p in psutil.Process().children()}
+
+    async def _launch(self, key: tuple, proxy_config: Optional[dict], url: str) -> PooledBrowser:
+        async with self._launch_lock:
+            # Launches are serialized, so the new child processes belong to this browser
+            before = self._child_pids()
+            crawler = AsyncWebCrawler(
+                config=BrowserConfig(headless=True, proxy_config=proxy_config, storage_state=load_state(url)),
+                verbose=True
+            )
+            await crawler.start()
+            browser = PooledBrowser(key, crawler, self._child_pids() - before)
+        logger.info(f"Launched browser for {key[1]} ({len(self._browsers)}/{self.size})")
+        return browser
+
+    async def _close(self, browser: PooledBrowser, reason: str):
+        if browser in self._browsers:
+            self._browsers.remove(browser)
+        logger.info(f"Recycling browser for {browser.key[1]}: {reason}")
+        try:
+            await asyncio.wait_for(browser.crawler.close(), timeout=15)
+        except Exception as e:
+            logger.warning(f"Browser did not close cleanly ({e}); killing its processes")
+            self._kill(browser)
+        async with self._available:
+            self._available.notify_all()
+
+    @staticmethod
+    def _kill(browser: PooledBrowser):
+        if psutil is None:
+            return
+        for pid in browser.pids:
+            try:
+                process = psutil.Process(pid)
+                for p in process.children(recursive=True) + [process]:
+                    p.kill()
+            except psutil.NoSuchProcess:
+                continue
+
+    async def _checkout(self, url: str, proxy_config: Optional[dict]) -> PooledBrowser:
+        parts = urlsplit(str(url))
+        key = ((proxy_config or {}).get("server"), f"{parts.scheme}://{parts.netloc}".lower())
+        async with self._available:
+            while True:
+                for browser in self._browsers:
+                    if browser.key == key and not browser.busy and not browser.retire:
+                        browser.busy = True
+                        return browser
+                if len(self._browsers) < self.size:
+                    break
+                idle = [b for b in self._browsers if not b.busy]
+                if idle and not any(b.key == key for b in self._browsers):
+                    # Make room by dropping the least recently used browser of another site
+                    # (unless this site already has one that will free up shortly)
+                    victim = min(idle, key=lambda b: b.last_used)
+                    victim.busy = True
+                    self._available.release()
+                    try:
+                        await self._close(victim, "making room for another site")
+                    finally:
+                        await self._available.acquire()
+                    continue
+                await self._available.wait()
+            placeholder = PooledBrowser(key, None, set())
+            placeholder.busy = True
+            self._browsers.append(placeholder)   # reserve the slot while launching
+
+        try:
+            browser = await self._launch(key, proxy_config, url)
+        except Exception:
+            self._browsers.remove(placeholder)
+            async with self._available:
+                self._available.notify_all()
+            raise
+        browser.busy = True
+        self._browsers[self._browsers.index(placeholder)] = browser
+        return browser
+
+    async def _release(self, browser: PooledBrowser, crashed: bool = False):
+        browser.busy = False
+        browser.last_used = time.monotonic()
+        reason = "crashed or timed out" if crashed else ("retired by watchdog" if browser.retire else browser.worn_out())
+        if reason:
+            await self._close(browser, reason)
+            return
+        async with self._available:
+            self._available.notify_all()
+
+    @asynccontextmanager
+    async def browser(self, url: str, proxy_config: Optional[dict] = None):
+        """Check out a crawler for the URL's site; a crash or cancellation inside discards it."""
+        browser = await self._checkout(url, proxy_config)
+        crashed = False
+        try:
+            yield browser.crawler
+        except asyncio.CancelledError:
+            crashed = True   # abandoned mid-render (run() timed out): the page may be wedged
+            raise
+        except Exception as e:
+            crashed = isinstance(e, BrowserCrashed) or is_browser_crash(e)
+            raise
+        finally:
+            browser.pages_served += 1
+            await self._release(browser, crashed)
+
+    async def render(self, url: str, operation: Callable[[AsyncWebCrawler], Awaitable[T]],
+                     proxy_config: Optional[dict] = None) -> T:
+        """Run `operation` with a pooled crawler, retrying on a fresh browser after a crash."""
+        for attempt in range(BROWSER_CRASH_RETRIES + 1):
+            try:
+                async with self.browser(url, proxy_config) as crawler:
+                    return await operation(crawler)
+            except Exception as e:
+                if not (isinstance(e, BrowserCrashed) or is_browser_crash(e)) or attempt >= BROWSER_CRASH_RETRIES:
+                    raise
+                logger.warning(f"Browser crashed rendering {url} ({e}); retrying on a fresh instance")
+
+    # -- watchdog ----------------------------------------------------------------------
+
+    async def _watchdog(self):
+        while True:
+            await asyncio.sleep(BROWSER_WATCHDOG_INTERVAL)
+            for browser in list(self._browsers):
+                if browser.crawler is None:
+                    continue
+                idle_for = time.monotonic() - browser.last_used
+                reason = browser.worn_out() or (
+                    "idle" if not browser.busy and idle_for >= BROWSER_IDLE_TIMEOUT else None)
+                if not reason:
+                    continue
+                if browser.busy:
+                    browser.retire = True   # closed when its current render finishes
+                else:
+                    browser.busy = True
+                    await self._close(browser, reason)
+
+    def stats(self) -> List[dict]:
+        return [b.as_dict() for b in self._browsers if b.crawler is not None]
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,64 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Optional
+from urllib.parse import urlsplit
+from data_dir import data_path
+
+logger = logging.getLogger(__name__)
+
+# Cookies and localStorage of source sites: session secrets, kept under DATA_DIR
+BROWSER_STATE_DIR = data_path(os.getenv("BROWSER_STATE_DIR", "browser_state"))
+BROWSER_STATE_TTL = int(os.getenv("BROWSER_STATE_TTL", str(24 * 3600)))   # seconds; 0 disables reuse
+
+
+def state_path(url: str, directory: str = BROWSER_STATE_DIR) -> str:
+    """Storage-state file for the source site (scheme + host) a URL belongs to."""
+    parts = urlsplit(str(url))
+    origin = f"{parts.scheme}://{parts.netloc}".lower()
+    name = hashlib.sha1(origin.encode("utf-8")).hexdigest()
+    return os.path.join(directory, f"{name}.json")
+
+
+def load_state(url: str, ttl: int = BROWSER_STATE_TTL) -> Optional[str]:
+    """
+    Path of a saved Playwright storage state (cookies + localStorage) for the URL's site,
+    or None when there is none or it is older than `ttl`, so consent and anti-bot
+    cookies are refreshed by a clean run now and then.
+    """
+    if ttl <= 0:
+        return None
+    path = state_path(url)
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return None
+    except OSError:
+        return None
+    return path
+
+
+def save_state(url: str, state: dict):
+    """Write a storage state atomically; a concurrent reader never sees a half-written file."""
+    path = state_path(url)
+    # Session cookies: readable by the service account only
+    os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Could not save browser state for {url}: {e}")
+
+
+def state_saving_hook(url: str):
+    """crawl4ai `before_return_html` hook that stores the context's state once the page is rendered."""
+    async def before_return_html(page, context, html=None, **kwargs):
+        try:
+            save_state(url, await context.storage_state())
+        except Exception as e:
+            logger.warning(f"Could not capture browser state for {url}: {e}")
+        return page
+    return before_return_html
@@ -0,0 +1,79 @@
+import re
+import codecs
+from typing import Optional
+
+# Optional: a statistical detector for pages that are neither declared nor valid UTF-8
+try:
+    from charset_normalizer import from_bytes
+except ImportError:
+    from_bytes = None
+
+SNIFF_BYTES = 4096
+DETECT_BYTES = 64 * 1024
+
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+_XML_ENCODING = re.compile(rb'^<\?xml[^>]+encoding\s*=\s*["\']([\w.:-]+)', re.IGNORECASE)
+
+
+def _normalize(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        codec = codecs.lookup(name.strip().lower()).name
+    except LookupError:
+        return None
+    # Browsers treat latin-1/ascii declarations as windows-1252
+    return "cp1252" if codec in ("latin-1", "iso8859-1", "ascii") else codec
+
+
+def declared_encoding(body: bytes, content_type: Optional[str] = None) -> Optional[str]:
+    """
+    Encoding the page declares, from in order: a BOM, the Content-Type charset,
+    or a <meta>/XML declaration within the first few KB. None when nothing is declared.
+    The BOM wins over the header, as in browsers (WHATWG encoding sniffing).
+    """
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return encoding
+
+    if content_type:
+        match = _HEADER_CHARSET.search(content_type)
+        encoding = _normalize(match.group(1)) if match else None
+        if encoding:
+            return encoding
+
+    head = body[:SNIFF_BYTES]
+    match = _META_CHARSET.search(head) or _XML_ENCODING.search(head)
+    encoding = _normalize(match.group(1).decode("ascii", "ignore")) if match else None
+    if encoding:
+        # A page declaring UTF-16 in ASCII-compatible bytes is really UTF-8 (HTML spec)
+        return "utf-8" if encoding.startswith("utf-16") else encoding
+    return None
+
+
+def _guess_encoding(body: bytes) -> str:
+    if from_bytes is not None:
+        best = from_bytes(body[:DETECT_BYTES]).best()
+        if best is not None and _normalize(best.encoding):
+            return _normalize(best.encoding)
+    return "cp1252"
+
+
+def decode_body(body: bytes, content_type: Optional[str] = None) -> str:
+    """Decode a page body once. Undeclared pages are tried as strict UTF-8 first (a single
+    fast pass whose result is kept); only bodies that fail it go to the detector."""
+    encoding = declared_encoding(body, content_type)
+    if encoding is None:
+        try:
+            return body.decode("utf-8")
+        except UnicodeDecodeError:
+            encoding = _guess_encoding(body)
+    return body.decode(encoding, errors="replace")
@@ -1,11 +1,48 @@
 import json
+import time
 import asyncio
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
+import logging
+from crawl4ai import CrawlerRunConfig, CacheMode
 from crawl4ai import JsonCssExtractionStrategy
 from models import ScrapeRequest, ScrapeResponse, FieldMapping
+from api_capture import find_item_arrays, fetch_api_rows
+from utils import get_http_session, PROXY_BLOCK_STATUSES
+from browser_pool import browser_pool, BrowserCrashed, is_browser_crash
+from robots import polite_wait
+from retry import call_with_retries, RetryableError, RETRYABLE_STATUSES
+from proxy_pool import proxy_pool
+from browser_state import state_saving_hook
+from asset_cache import asset_route_hook
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+
+def is_transient_crawl_failure(result) -> bool:
+    """5xx/429 responses and network-level failures (no status) are worth retrying."""
+    status = getattr(result, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    message = (result.error_message or "").lower()
+    return "timeout" in message or "net::err" in message or "connection" in message
+
+
 async def extract_website(request: ScrapeRequest) -> ScrapeResponse:
+    """Render the page with a pooled browser and extract the mapped fields.
+    Runs on the browser pool's loop: call it through browser_pool.run()."""
+    if request.api_binding:
+        # Bound to a JSON endpoint discovered earlier - call it directly, no browser needed
+        data = await fetch_api_rows(request.api_binding, request.timeout, request.max_items)
+        return ScrapeResponse(
+            entity_name=request.entity_name,
+            url=str(request.url),
+            scraped_at=datetime.now(),
+            total_items=len(data),
+            data=data,
+            success=True,
+            message=f"Successfully fetched {len(data)} {request.entity_name} entries from API"
+        )
+
     # 1. Build schema from ScrapeRequest
     fields = []
     for field_name, field_mapping in request.field_mappings.items():
@@ -33,46 +70,74 @@ async def extract_website(request: ScrapeRequest) -> ScrapeResponse:
         extraction_strategy=extraction_strategy,
     )
 
-    try:
-        async with AsyncWebCrawler(verbose=True) as crawler:
-            # 4. Run the crawl and extraction
+    # The browser's egress goes through the proxy pinned to this host, if a pool is configured
+    proxy = proxy_pool.acquire(str(request.url))
+
+    async def crawl(crawler):
+        crawler.crawler_strategy.set_hook("before_return_html", state_saving_hook(str(request.url)))
+        # Same-origin JS/CSS/fonts/images come from the shared asset cache after the first render
+        crawler.crawler_strategy.set_hook("on_page_context_created", asset_route_hook(str(request.url)))
+
+        # 4. Run the crawl and extraction, retrying transient failures
+        async def attempt():
+            # Same robots.txt cache and per-host rate limit as the static fetcher
+            await polite_wait(request.url, get_http_session())
+            started = time.monotonic()
             result = await crawler.arun(
                 url=str(request.url), 
                 config=config
             )
+            if not result.success and is_browser_crash(result.error_message):
+                raise BrowserCrashed(result.error_message)
+            if not result.success and is_transient_crawl_failure(result):
+                proxy_pool.record_failure(proxy)
+                raise RetryableError(result.error_message or "Crawl failed")
+            # Only a completed fetch counts for the proxy; other failures say nothing about it
+            status = getattr(result, "status_code", None)
+            if status in PROXY_BLOCK_STATUSES:
+                proxy_pool.record_failure(proxy)
+            elif result.success:
+                proxy_pool.record_success(proxy, time.monotonic() - started)
+            return result
+
+        return await call_with_retries(str(request.url), attempt)
 
-            if not result.success:
-                print("Crawl failed:", result.error_message)
-                return ScrapeResponse(
-                    entity_name=request.entity_name,
-                    url=str(request.url),
-                    scraped_at=datetime.now(),
-                    total_items=0,
-                    data=[],
-                    success=False,
-                    message=f"Crawl failed: {result.error_message}"
-                )
-
-            # 5. Parse the extracted JSON
-            data = json.loads(result.extracted_content) if result.extracted_content else []
-            
-            # Limit items if max_items is specified
-            if request.max_items and len(data) > request.max_items:
-                data = data[:request.max_items]
-            
-            print(f"Extracted {len(data)} {request.entity_name} entries")
-            print(json.dumps(data, indent=2) if data else "No data found")
-            
+    try:
+        # A pooled browser for this site and proxy; a crash is retried once on a fresh instance
+        result = await browser_pool.render(str(request.url), crawl, proxy.browser_config() if proxy else None)
+
+        if not result.success:
+            print("Crawl failed:", result.error_message)
             return ScrapeResponse(
                 entity_name=request.entity_name,
                 url=str(request.url),
                 scraped_at=datetime.now(),
-                total_items=len(data),
-                data=data,
-                success=True,
-                message="Successfully scraped data"
+                total_items=0,
+                data=[],
+                success=False,
+                message=f"Crawl failed: {result.error_message}"
             )
-            
+
+        # 5. Parse the extracted JSON
+        data = json.loads(result.extracted_content) if result.extracted_content else []
+        
+        # Limit items if max_items is specified
+        if request.max_items and len(data) > request.max_items:
+            data = data[:request.max_items]
+        
+        print(f"Extracted {len(data)} {request.entity_name} entries")
+        print(json.dumps(data, indent=2) if data else "No data found")
+        
+        return ScrapeResponse.model_construct(
+            entity_name=request.entity_name,
+            url=str(request.url),
+            scraped_at=datetime.now(),
+            total_items=len(data),
+            data=data,
+            success=True,
+            message="Successfully scraped data"
+        )
+        
     except Exception as e:
         print(f"Error during scraping: {str(e)}")
         return ScrapeResponse(
@@ -84,3 +149,72 @@ async def extract_website(request: ScrapeRequest) -> ScrapeResponse:
             success=False,
             message=f"Error during scraping: {str(e)}"
         )
+
+
+def request_body(req):
+    """A captured request's body: parsed JSON, else the raw text (e.g. a form-encoded POST)."""
+    try:
+        return req.post_data_json
+    except Exception:
+        return req.post_data
+
+
+async def discover_json_apis(url: str, timeout: int = 30) -> list:
+    """
+    Render the page and record the XHR/fetch responses that returned JSON.
+
+    Each discovered endpoint comes with the item arrays found in its payload, so a
+    mapping can be bound to it (see ApiBinding) and later runs skip the browser.
+    Renders in a pooled browser: call it through browser_pool.run(), like extract_website.
+    """
+    captured = []
+    pending = []
+
+    async def record(response):
+        try:
+            req = response.request
+            if req.resource_type not in ("xhr", "fetch"):
+                return
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+            payload = await response.json()
+            captured.append({
+                "endpoint": response.url,
+                "method": req.method,
+                "status": response.status,
+                "body": request_body(req) if req.method != "GET" else None,
+                "item_arrays": find_item_arrays(payload)
+            })
+        except Exception as e:
+            logger.warning(f"Skipping captured response {response.url}: {e}")
+
+    async def on_page_context_created(page, context, **kwargs):
+        page.on("response", lambda response: pending.append(asyncio.ensure_future(record(response))))
+        return page
+
+    config = CrawlerRunConfig(
+        cache_mode=CacheMode.BYPASS,
+        page_timeout=timeout * 1000,
+    )
+
+    async def discover(crawler):
+        # A retry after a crash starts over on a fresh page
+        captured.clear()
+        pending.clear()
+        crawler.crawler_strategy.set_hook("on_page_context_created", on_page_context_created)
+        crawler.crawler_strategy.set_hook("before_return_html", state_saving_hook(url))
+        await polite_wait(url, get_http_session())
+        result = await crawler.arun(url=str(url), config=config)
+        # Let in-flight body reads finish before the page is handed back to the pool
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        return result
+
+    # The site's pooled browser (launched with its saved storage state); a crash is retried once
+    result = await browser_pool.render(str(url), discover)
+
+    if not result.success:
+        raise RuntimeError(f"Crawl failed: {result.error_message}")
+
+    logger.info(f"Discovered {len(captured)} JSON endpoints on {url}")
+    return captured
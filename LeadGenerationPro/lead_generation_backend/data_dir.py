@@ -0,0 +1,10 @@
+import os
+
+# Runtime state (browser cookies, crawl frontiers, disk caches) lives outside the source tree.
+# Relative *_DIR settings are resolved against DATA_DIR; absolute ones are used as given.
+DATA_DIR = os.path.abspath(os.path.expanduser(os.getenv("DATA_DIR", os.path.join("~", ".lead_generation_pro"))))
+
+
+def data_path(*parts: str) -> str:
+    """Path under DATA_DIR (unchanged when the first part is already absolute)."""
+    return os.path.join(DATA_DIR, *parts)
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Sequence, Set
+from urllib.parse import urljoin
+from models import DetailMapping
+from utils import extract_row, fetch_page
+from url_frontier import canonicalize_url
+from result_buffer import ColumnarRows
+
+logger = logging.getLogger(__name__)
+
+
+def _is_blank(value) -> bool:
+    """Missing or empty - unlike 0 and False, which are real values (persisted as such)."""
+    return value is None or value == ''
+
+
+async def crawl_details(rows: Sequence[dict], detail: DetailMapping, base_url: str,
+                        timeout: int = 15, seen_urls: Optional[Set[str]] = None,
+                        sink: Optional[Callable[[List[dict]], None]] = None) -> Sequence[dict]:
+    """
+    Follow each row's link field into its detail page and merge the detail fields into the row.
+
+    Detail pages are fetched by a bounded pool of workers draining a queue. URLs already in
+    `seen_urls` (a set or a URLFrontier run) are not fetched again; every URL fetched
+    here is added to it. URLs are deduplicated by their canonical form, so tracking params and
+    fragments don't cause refetches; pages are fetched from the link as found.
+    `sink`, when given, receives the rows as they complete: rows with nothing to fetch at once,
+    the others as soon as their detail page is merged (or has failed).
+    Returns the rows to keep. With `skip_seen`, rows whose detail page an earlier run crawled
+    are dropped: that run already persisted them with their detail fields.
+    """
+    if seen_urls is None:
+        seen_urls = set()
+    loop = asyncio.get_running_loop()
+
+    # Several listing rows can point to the same detail page - fetch it once.
+    # Rows are tracked by index, so the ones to drop can be removed from the buffer at the end
+    targets: Dict[str, List[int]] = {}
+    fetch_urls: Dict[str, str] = {}   # canonical key -> URL to fetch
+    ready: List[int] = []   # rows with no detail page to wait for
+    dropped: Set[int] = set()
+    for index, row in enumerate(rows):
+        for field_name in detail.field_mappings:
+            row.setdefault(field_name, '')
+        link = row.get(detail.link_field)
+        if not link:
+            ready.append(index)
+            continue
+        fetch_url = urljoin(base_url, link)
+        try:
+            url = canonicalize_url(fetch_url)
+        except ValueError as e:
+            # e.g. an out-of-range port - one bad href must not abort the scrape
+            logger.warning(f"Skipping malformed detail link {link!r}: {e}")
+            ready.append(index)
+            continue
+        targets.setdefault(url, []).append(index)
+        fetch_urls.setdefault(url, fetch_url)
+
+    if detail.skip_seen and targets:
+        # A URLFrontier answers from SQLite - keep that I/O off the event loop
+        seen = await loop.run_in_executor(None, lambda: {url for url in targets if url in seen_urls})
+        for url in seen:
+            dropped.update(targets.pop(url))
+
+    if sink is not None and ready:
+        sink([dict(rows[i]) for i in ready])
+
+    if targets:
+        await _fetch_details(rows, targets, fetch_urls, detail, base_url, timeout, seen_urls, sink)
+
+    if not dropped:
+        return rows
+    kept = [i for i in range(len(rows)) if i not in dropped]
+    return rows.take(kept) if isinstance(rows, ColumnarRows) else [rows[i] for i in kept]
+
+
+async def _fetch_details(rows: Sequence[dict], targets: Dict[str, List[int]], fetch_urls: Dict[str, str],
+                         detail: DetailMapping, base_url: str, timeout: int, seen_urls, sink) -> int:
+    """Fetch each target detail page with a bounded worker pool and merge it into its rows."""
+    queue = asyncio.Queue(maxsize=detail.max_concurrency * 2)
+    fetched = 0
+
+    async def worker():
+        nonlocal fetched
+        while True:
+            url = await queue.get()
+            try:
+                if url is None:
+                    return
+                soup = await fetch_page(fetch_urls[url], timeout)
+                scope = soup.select_one(detail.container_selector) if detail.container_selector else soup
+                values = extract_row(scope, detail.field_mappings)
+                for row in (rows[i] for i in targets[url]):
+                    for field_name, value in values.items():
+                        # Detail values fill in the row, but never blank out a listing value
+                        if not _is_blank(value) or _is_blank(row.get(field_name)):
+                            row[field_name] = value
+                seen_urls.add(url)
+                fetched += 1
+            except Exception as e:
+                logger.warning(f"Detail page {url} failed: {e}")
+            finally:
+                if sink is not None and url is not None:
+                    sink([dict(rows[i]) for i in targets[url]])
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, detail.max_concurrency))]
+    try:
+        for url in targets:
+            await queue.put(url)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+
+    logger.info(f"Fetched {fetched}/{len(targets)} detail pages for {base_url}")
+    return fetched
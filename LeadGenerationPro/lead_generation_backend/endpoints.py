@@ -1,18 +1,42 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from bs4 import BeautifulSoup
 from datetime import datetime
 import asyncio
-from models import SourceInfo, SourcesListResponse, FieldMapping, ScrapeRequest, ScrapeResponse, EntityRequest, EntityMappingRequest, EntityInfo, EntitiesListResponse, Attribute, MappingsListResponse, MappingInfo, MappingFormRequest, TaskInfo,TaskRequest,TasksListResponse, TaskUpdateRequest
-from utils import extract_value, fetch_page
+from models import SourceInfo, SourcesListResponse, FieldMapping, ScrapeRequest, ScrapeResponse, EntityRequest, EntityMappingRequest, EntityInfo, EntitiesListResponse, Attribute, MappingsListResponse, MappingInfo, MappingFormRequest, TaskInfo,TaskRequest,TasksListResponse, TaskUpdateRequest, DiscoverApisRequest, SitemapDiscoveryRequest, JobRequest
+from retry import is_transient
+from utils import extract_values, fetch_html, close_http_session, is_structured_field
+from structured_data import is_structured_mapping, structured_items, structured_rows
+from detail_crawler import crawl_details
+from api_capture import fetch_api_rows
+from result_cache import result_cache
+from proxy_pool import proxy_pool
+from browser_pool import browser_pool, RenderTimeout, BROWSER_RENDER_TIMEOUT
+from admission import render_admission, Overloaded, remaining
+from contextlib import nullcontext
+from fast_json import FastJSONResponse, json_response
+from result_buffer import ColumnarRows, as_columnar
+from entity_export import EXPORT_FORMATS, export_chunks
+from entity_query import RowsQuery, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from schema_catalog import TableSchema, schema_catalog
+from jobs import Job, job_manager
+from fingerprint import content_fingerprint, mapping_fingerprint
+from url_frontier import get_frontier
+from sitemap import discover_sitemap_urls, SitemapError
+from simhash import simhash, main_text, bands, hamming_distance, to_signed, from_signed
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import sys
-from crawl4Util import extract_website
+from crawl4Util import extract_website, discover_json_apis
 import asyncio
 from asyncio import WindowsProactorEventLoopPolicy  # For proper subprocess support on Windows
 import psycopg2
 import os
+import re
 import json
+import itertools
 from psycopg2.extras import Json
 from psycopg2 import sql
 from urllib.parse import urlparse
@@ -30,13 +54,17 @@ DB_PASS = os.getenv("DB_PASS", "9042c98a")
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 
-conn = psycopg2.connect(
-    dbname=DB_NAME,
-    user=DB_USER,
-    password=DB_PASS,
-    host=DB_HOST,
-    port=DB_PORT
-)
+def new_connection():
+    """A fresh database connection (exports stream over their own, see entity_export)."""
+    return psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASS,
+        host=DB_HOST,
+        port=DB_PORT
+    )
+
+conn = new_connection()
 cur = conn.cursor()
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -45,7 +73,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Dynamic Web Scraper API",
     description="A flexible web scraper that accepts entity configurations at runtime",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 
@@ -57,17 +86,162 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+
+@app.on_event("startup")
+async def upgrade_schema():
+    """Add columns introduced after the system tables were first created."""
+    cur = conn.cursor()
+    try:
+        cur.execute("ALTER TABLE IF EXISTS entity_mappings ADD COLUMN IF NOT EXISTS detail_mapping JSONB;")
+        cur.execute("ALTER TABLE IF EXISTS entity_mappings ADD COLUMN IF NOT EXISTS api_binding JSONB;")
+        cur.execute("ALTER TABLE IF EXISTS entity_mappings ADD COLUMN IF NOT EXISTS structured_type TEXT;")
+        cur.execute("ALTER TABLE IF EXISTS sources ADD COLUMN IF NOT EXISTS max_response_bytes INT;")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Schema upgrade skipped: {e}")
+    finally:
+        cur.close()
+
+
+@app.on_event("startup")
+async def listen_for_schema_changes():
+    # Other workers' DDL invalidates this worker's schema catalog over LISTEN/NOTIFY
+    schema_catalog.start_listener(new_connection)
+
+
+@app.on_event("shutdown")
+async def shutdown_http_session():
+    await close_http_session()
+    # Closing the pooled browsers and the schema listener block on their threads
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, browser_pool.shutdown)
+    await loop.run_in_executor(None, schema_catalog.stop_listener)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Receives batches of finished rows while a scrape is still running (e.g. Job.add_rows)
+RowSink = Callable[[List[dict]], None]
+
+
+def wants_ndjson(http_request: Optional[Request]) -> bool:
+    """Clients opt into streamed results with `Accept: application/x-ndjson`."""
+    return http_request is not None and NDJSON_MEDIA_TYPE in http_request.headers.get("accept", "")
+
+
+def ndjson_line(record: dict) -> bytes:
+    return (json.dumps(jsonable_encoder(record), separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def ndjson_records(request: ScrapeRequest, rows: Iterable[dict]) -> Iterator[bytes]:
+    """
+    A header record, one line per row as the iterator produces it, then an end record with the
+    outcome. Each row is serialized and released before the next one is extracted.
+    Only failures after the 200 went out end up in the end record; the endpoints raise
+    earlier ones as HTTP errors before streaming.
+    """
+    yield ndjson_line({"type": "header", "entity_name": request.entity_name, "url": str(request.url),
+                       "scraped_at": datetime.now()})
+    total = 0
+    failure = None
+    try:
+        for row in rows:
+            total += 1
+            yield ndjson_line({"type": "row", "data": row})
+    except Exception as e:
+        logger.error("Error while streaming rows", exc_info=True)
+        failure = f"Scraping failed after {total} rows: {e}"
+    yield ndjson_line({
+        "type": "end",
+        "success": failure is None,
+        "total_items": total,
+        "message": failure or f"Successfully scraped {total} {request.entity_name} items"
+    })
+
+
+def ndjson_response(request: ScrapeRequest, rows: Iterable[dict]) -> StreamingResponse:
+    return StreamingResponse(ndjson_records(request, rows), media_type=NDJSON_MEDIA_TYPE)
+
+
 @app.post("/scrapedynamic", response_model=ScrapeResponse)
-def scrape_dynamic(request: ScrapeRequest):
+def scrape_dynamic(request: ScrapeRequest, http_request: Request = None):
+    """Render the page with a pooled browser. Send `Accept: application/x-ndjson` to stream the rows."""
+    response = run_cached_dynamic_scrape(request)
+    if wants_ndjson(http_request):
+        if not response.success:
+            # Nothing streamed yet: fail with a status instead of a 200 and an error record
+            raise HTTPException(status_code=502, detail=response.message)
+        return ndjson_response(request, response.data)
+    # Serialized directly: the rows were produced here and need no response_model re-validation
+    return json_response(response, http_request)
+
+
+def run_cached_dynamic_scrape(request: ScrapeRequest) -> ScrapeResponse:
+    cache_key = result_cache.make_key(request, "dynamic")
+    if not request.bypass_cache:
+        cached = result_cache.get(cache_key, request.max_age)
+        if cached:
+            return cached
     try:
-        response = asyncio.run(extract_website(request))
+        # API-bound mappings never open a browser, so they skip render admission
+        admission = nullcontext() if request.api_binding else render_admission.admit(request.timeout or 15)
+        with admission as deadline:
+            # Time spent queued comes out of the render's budget: the browser is held only until
+            # the request's own deadline
+            timeout = BROWSER_RENDER_TIMEOUT if deadline is None else min(BROWSER_RENDER_TIMEOUT, remaining(deadline))
+            response = browser_pool.run(extract_website(request), timeout)
+        if response.success:
+            result_cache.put(cache_key, response)
         return response
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Dynamic scraping is overloaded: {e}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except RenderTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Scraping error: {e}")
+    except HTTPException:
+        # e.g. a replayed API call that failed with its own status
+        raise
     except Exception as e:
         logger.error("Error during dynamic scraping", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Scraping error: {e}")
 
+@app.post("/discover-apis", response_model=dict)
+def discover_apis(request: DiscoverApisRequest):
+    """
+    Render a page and list the JSON (XHR/fetch) endpoints it called.
+
+    Pick one of the returned endpoints and an items_path, add JSONPath field selectors
+    and save it as the mapping's api_binding - task runs then call the API directly.
+    """
+    try:
+        # Renders in a pooled browser, admitted like /scrapedynamic
+        with render_admission.admit(request.timeout or 30) as deadline:
+            endpoints = browser_pool.run(discover_json_apis(str(request.url), request.timeout),
+                                         min(BROWSER_RENDER_TIMEOUT, remaining(deadline)))
+        return {
+            "success": True,
+            "url": str(request.url),
+            "total_endpoints": len(endpoints),
+            "endpoints": endpoints
+        }
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Dynamic scraping is overloaded: {e}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except RenderTimeout as e:
+        raise HTTPException(status_code=504, detail=f"API discovery error: {e}")
+    except Exception as e:
+        logger.error("Error during API discovery", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"API discovery error: {e}")
+
 @app.post("/scrapestatic", response_model=ScrapeResponse)
-async def scrape_website(request: ScrapeRequest):
+async def scrape_website(request: ScrapeRequest, http_request: Request = None):
     """
     Scrape a website based on the provided entity configuration
     
@@ -86,72 +260,282 @@ async def scrape_website(request: ScrapeRequest):
         "max_items": 50
     }
     ```
+
+    With `Accept: application/x-ndjson` the rows are streamed as newline-delimited JSON
+    while they are extracted (see ndjson_records); streamed results are not cached. A scrape
+    that fails before its first row answers with an HTTP error instead of a stream.
     """
     
+    if wants_ndjson(http_request):
+        cached = None if request.bypass_cache else result_cache.get(result_cache.make_key(request, "static"), request.max_age)
+        if cached:
+            return ndjson_response(request, cached.data)
+        return ndjson_response(request, await open_static_rows(request))
+    # Serialized directly: the rows were produced here and need no response_model re-validation
+    return json_response(await run_cached_static_scrape(request), http_request)
+
+
+async def run_cached_static_scrape(request: ScrapeRequest, sink: Optional[RowSink] = None) -> ScrapeResponse:
+    """The cached result if fresh enough, else a new scrape; `sink` receives the rows either way."""
+    cache_key = result_cache.make_key(request, "static")
+    if not request.bypass_cache:
+        cached = result_cache.get(cache_key, request.max_age)
+        if cached:
+            if sink is not None:
+                sink(cached.data)
+            return cached
     try:
-        # Fetch and parse the page
-        soup = await fetch_page(request.url, request.timeout)
-        
-        # Extract data
-        data = []
-        
-        if request.container_selector:
-            # Multiple items scenario
-            containers = soup.select(request.container_selector)
-            
-            if not containers:
-                return ScrapeResponse(
-                    entity_name=request.entity_name,
-                    url=str(request.url),
-                    scraped_at=datetime.now(),
-                    total_items=0,
-                    data=[],
-                    success=False,
-                    message=f"No containers found with selector: {request.container_selector}"
-                )
-            
-            # Limit items if max_items is specified
-            if request.max_items:
-                containers = containers[:request.max_items]
-            
-            for i, container in enumerate(containers, 1):
-                row = {"index": i}
-                
-                for field_name, mapping in request.field_mappings.items():
-                    element = container.select_one(mapping.selector)
-                    row[field_name] = extract_value(element, mapping.extract)
-                
-                # Only add row if it has some non-empty values
-                if any(v for k, v in row.items() if k != "index" and v):
-                    data.append(row)
-        
+        response = await run_static_scrape(request, sink=sink)
+        if response.success:
+            result_cache.put(cache_key, response)
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
+
+
+@app.post("/jobs", response_model=dict, status_code=202)
+async def submit_job(request: JobRequest):
+    """
+    Start a static or dynamic scrape in the background and return its job id at once.
+    Poll GET /jobs/{job_id} or follow GET /jobs/{job_id}/events for progress and rows.
+    """
+    if request.mode not in ("static", "dynamic"):
+        raise HTTPException(status_code=400, detail="mode must be 'static' or 'dynamic'")
+    scrape = request.request
+
+    async def work(job: Job):
+        if request.mode == "dynamic":
+            # Blocks on render admission and the browser pool, so keep it off the event loop;
+            # the browser hands back the whole page's rows at once
+            response = await asyncio.get_running_loop().run_in_executor(None, run_cached_dynamic_scrape, scrape)
+            job.add_rows(response.data)
         else:
-            # Single item scenario
-            row = {}
-            
-            for field_name, mapping in request.field_mappings.items():
-                element = soup.select_one(mapping.selector)
-                row[field_name] = extract_value(element, mapping.extract)
-            
-            # Only add if has some non-empty values
-            if any(row.values()):
-                data.append(row)
-        
+            # Rows reach the job (and its event stream) as they are extracted and completed
+            response = await run_cached_static_scrape(scrape, sink=job.add_rows)
+        job.finish(response.success, response.message)
+
+    job = job_manager.submit(Job(request.mode, scrape.entity_name, str(scrape.url)), work)
+    return {"success": True, **job.summary()}
+
+
+@app.get("/jobs/{job_id}", response_model=dict)
+async def get_job(job_id: str, offset: int = 0, http_request: Request = None):
+    """Job status plus the rows produced so far, starting at `offset`."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return json_response({"success": True, **job.summary(), "offset": offset, "data": job.rows[offset:]}, http_request)
+
+
+def sse_event(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(payload))}\n\n"
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, offset: int = 0):
+    """
+    Server-sent events for a job: `status` when it changes, `rows` with each new batch
+    of rows (from `offset` on), and a final `done`. Comment lines keep idle proxies open.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+
+    async def events():
+        sent = max(0, offset)
+        last_status = None
+        while True:
+            version = job.version
+            if job.status != last_status:
+                last_status = job.status
+                yield sse_event("status", job.summary())
+            if len(job.rows) > sent:
+                yield sse_event("rows", {"offset": sent, "rows": job.rows[sent:]})
+                sent = len(job.rows)
+            if job.finished:
+                yield sse_event("done", job.summary())
+                return
+            await job.wait_for_change(version, timeout=15)
+            if job.version == version:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def open_static_rows(request: ScrapeRequest) -> Iterable[dict]:
+    """
+    Rows of a static scrape for streaming. Everything that can fail before the first row
+    is done here and raised as an HTTPException, so a stream only starts for a scrape that
+    is producing rows: the page is fetched and parsed up front and the first row extracted,
+    the rest are extracted lazily, one per container. API, structured-data and detail scrapes
+    need their full result first and go through run_static_scrape.
+    """
+    try:
+        if request.api_binding or request.detail_mapping or is_structured_mapping(request.field_mappings):
+            response = await run_static_scrape(request)
+            if not response.success:
+                raise HTTPException(status_code=422, detail=response.message)
+            return response.data
+
+        html = await fetch_html(request.url, request.timeout, request.max_bytes)
+        soup, structured_item = parse_page(html, request)
+        if request.container_selector and soup.select_one(request.container_selector) is None:
+            raise HTTPException(status_code=422,
+                                detail=f"No containers found with selector: {request.container_selector}")
+        rows = iter_dom_rows(soup, request, structured_item)
+        first = next(rows, None)
+        return [] if first is None else itertools.chain([first], rows)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
+
+
+def parse_page(html: str, request: ScrapeRequest):
+    """Parse the page; jsonld fields mixed with CSS fields read from its first matching schema.org item."""
+    soup = BeautifulSoup(html, 'html.parser')
+    structured_item = None
+    if any(is_structured_field(m) for m in request.field_mappings.values()):
+        items = structured_items(html, request.structured_type)
+        structured_item = items[0] if items else None
+    return soup, structured_item
+
+
+def dom_fields(request: ScrapeRequest) -> List[str]:
+    """Names of the values iter_dom_values yields, in order."""
+    fields = list(request.field_mappings)
+    return ["index"] + fields if request.container_selector else fields
+
+
+def iter_dom_values(soup, request: ScrapeRequest, structured_item: Optional[dict] = None) -> Iterator[list]:
+    """Each extracted row as a list of values (see dom_fields): one per container, or a single row for the whole page."""
+    if request.container_selector:
+        containers = soup.select(request.container_selector)
+
+        # Limit items if max_items is specified
+        if request.max_items:
+            containers = containers[:request.max_items]
+
+        for i, container in enumerate(containers, 1):
+            values = extract_values(container, request.field_mappings, structured_item)
+
+            # Only add row if it has some non-empty values
+            if any(values):
+                values.insert(0, i)
+                yield values
+    else:
+        # Single item scenario
+        values = extract_values(soup, request.field_mappings, structured_item)
+
+        # Only add if has some non-empty values
+        if any(values):
+            yield values
+
+
+def iter_dom_rows(soup, request: ScrapeRequest, structured_item: Optional[dict] = None) -> Iterator[dict]:
+    """Yield extracted rows one at a time, as dicts."""
+    fields = dom_fields(request)
+    for values in iter_dom_values(soup, request, structured_item):
+        yield dict(zip(fields, values))
+
+
+def dom_columns(soup, request: ScrapeRequest, structured_item: Optional[dict] = None) -> ColumnarRows:
+    """Extract the page's rows straight into columns, with no dict per row."""
+    rows = ColumnarRows(dom_fields(request))
+    for values in iter_dom_values(soup, request, structured_item):
+        rows.append_values(values)
+    return rows
+
+
+async def extract_static_rows(request: ScrapeRequest, seen_urls: Optional[Set[str]] = None,
+                              html: Optional[str] = None,
+                              sink: Optional[RowSink] = None) -> Tuple[Sequence[dict], Optional[str]]:
+    """
+    Fetch the page (unless its html is given), extract rows and follow detail links if the request has a detail mapping.
+    Returns the rows and, when the page yielded none, a failure message. DOM rows come back as
+    a ColumnarRows buffer; it stays internal (task runs COPY from it), run_static_scrape
+    converts it for responses. `sink` receives detail-crawled rows page by page (see crawl_details).
+    """
+    if request.api_binding:
+        # Mappings bound to a discovered JSON API call it directly - no HTML to fetch or parse
+        data = await fetch_api_rows(request.api_binding, request.timeout, request.max_items)
+    elif is_structured_mapping(request.field_mappings):
+        # Every field reads schema.org JSON-LD/microdata - the page DOM is never built
+        if html is None:
+            html = await fetch_html(request.url, request.timeout, request.max_bytes)
+        data = structured_rows(html, request.field_mappings, request.structured_type, request.max_items)
+        if not data:
+            return [], f"No structured data found for type: {request.structured_type or 'any'}"
+    else:
+        # Fetch and parse the page
+        if html is None:
+            html = await fetch_html(request.url, request.timeout, request.max_bytes)
+        soup, structured_item = parse_page(html, request)
+
+        if request.container_selector and soup.select_one(request.container_selector) is None:
+            return [], f"No containers found with selector: {request.container_selector}"
+
+        # Extract data, column by column
+        data = dom_columns(soup, request, structured_item)
+
+    # Follow listing links into detail pages and merge their fields into each row
+    if request.detail_mapping and data:
+        data = await crawl_details(data, request.detail_mapping, str(request.url), request.timeout, seen_urls, sink)
+    return data, None
+
+
+async def run_static_scrape(request: ScrapeRequest, seen_urls: Optional[Set[str]] = None,
+                            html: Optional[str] = None, sink: Optional[RowSink] = None) -> ScrapeResponse:
+    """
+    Scrape the page into a ScrapeResponse (see extract_static_rows).
+    `sink` receives the rows as soon as they are final: right after extraction, or page by page
+    while detail links are followed. The response still carries all of them.
+    """
+    rows, failure = await extract_static_rows(request, seen_urls, html, sink)
+    if failure:
         return ScrapeResponse(
             entity_name=request.entity_name,
             url=str(request.url),
             scraped_at=datetime.now(),
-            total_items=len(data),
-            data=data,
-            success=True,
-            message=f"Successfully scraped {len(data)} {request.entity_name} items"
+            total_items=0,
+            data=[],
+            success=False,
+            message=failure
         )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
 
+    data = rows.to_dicts() if isinstance(rows, ColumnarRows) else rows
+    if sink is not None and data and not request.detail_mapping:
+        sink(data)
+
+    # Built from our own extraction, so the rows skip pydantic validation
+    return ScrapeResponse.model_construct(
+        entity_name=request.entity_name,
+        url=str(request.url),
+        scraped_at=datetime.now(),
+        total_items=len(data),
+        data=data,
+        success=True,
+        message=f"Successfully scraped {len(data)} {request.entity_name} items"
+    )
+
+
+# Near-duplicate detection for task runs; distances below the 4 SimHash bands are found exactly
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "3"))
+SIMHASH_WINDOW_HOURS = int(os.getenv("SIMHASH_WINDOW_HOURS", "24"))
+# Pages with less text than this (JS shells, error pages) are never compared
+SIMHASH_MIN_SHINGLES = int(os.getenv("SIMHASH_MIN_SHINGLES", "20"))
+
+# Sitemap-discovered pages scraped per task run
+SITEMAP_PAGES_PER_RUN = int(os.getenv("SITEMAP_PAGES_PER_RUN", "200"))
+
+# Tables the backend keeps for itself - never listed or served as entities
+SYSTEM_TABLES = ('entity_mappings', 'sources', 'tasks', 'task_runs', 'page_fingerprints', 'page_simhashes')
 
 # Map from your datatype names to PostgreSQL
 TYPE_MAP = {
@@ -179,6 +563,7 @@ async def save_entity(request: EntityRequest):
 
         # Build columns
         cols = [sql.SQL("id SERIAL PRIMARY KEY")]
+        indexes = []
         for attr in request.attributes:
             fname = attr.name.strip()
             dt = attr.datatype.strip().lower()
@@ -190,6 +575,13 @@ async def save_entity(request: EntityRequest):
                 sql.Identifier(fname),
                 sql.SQL(TYPE_MAP[dt])
             ))
+            if attr.indexed:
+                # Identifiers are capped at 63 bytes by PostgreSQL
+                indexes.append(sql.SQL("CREATE INDEX IF NOT EXISTS {index} ON {table} ({column});").format(
+                    index=sql.Identifier(f"{table_name}_{fname}_idx"[:63]),
+                    table=sql.Identifier(table_name),
+                    column=sql.Identifier(fname)
+                ))
 
         # Create table
         cur = conn.cursor()
@@ -198,14 +590,19 @@ async def save_entity(request: EntityRequest):
             fields=sql.SQL(", ").join(cols)
         )
         cur.execute(create_stmt)
+        for index_stmt in indexes:
+            cur.execute(index_stmt)
+        schema_catalog.notify(cur, table_name)
         conn.commit()
+        schema_catalog.invalidate(table_name)
         cur.close()
 
         return {
             "success": True,
             "message": f"Entity '{table_name}' created successfully.",
             "table_name": table_name,
-            "columns_created": len(cols)
+            "columns_created": len(cols),
+            "indexes_created": len(indexes)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create entity: {str(e)}")
@@ -222,8 +619,7 @@ async def edit_entity(table_name: str, request: EntityRequest):
         cur = conn.cursor()
         
         # Check if table exists
-        cur.execute("SELECT EXISTS(SELECT 1 FROM information_schema.tables WHERE table_name = %s)", (table_name,))
-        if not cur.fetchone()[0]:
+        if schema_catalog.table(cur, table_name) is None:
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
 
         # Add new columns
@@ -246,7 +642,9 @@ async def edit_entity(table_name: str, request: EntityRequest):
             except Exception:
                 continue  # Skip if column already exists or other error
 
+        schema_catalog.notify(cur, table_name)
         conn.commit()
+        schema_catalog.invalidate(table_name)
         cur.close()
 
         return {
@@ -256,8 +654,10 @@ async def edit_entity(table_name: str, request: EntityRequest):
             "columns_added": added_cols
         }
     except HTTPException:
+        conn.rollback()
         raise
     except Exception as e:
+        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to edit entity: {str(e)}")
 
 
@@ -272,14 +672,15 @@ async def delete_entity(table_name: str):
         cur = conn.cursor()
         
         # Check if table exists
-        cur.execute("SELECT EXISTS(SELECT 1 FROM information_schema.tables WHERE table_name = %s)", (table_name,))
-        if not cur.fetchone()[0]:
+        if schema_catalog.table(cur, table_name) is None:
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
 
         # Drop table
         drop_stmt = sql.SQL("DROP TABLE {table};").format(table=sql.Identifier(table_name))
         cur.execute(drop_stmt)
+        schema_catalog.notify(cur, table_name)
         conn.commit()
+        schema_catalog.invalidate(table_name)
         cur.close()
 
         return {
@@ -288,8 +689,10 @@ async def delete_entity(table_name: str):
             "table_name": table_name
         }
     except HTTPException:
+        conn.rollback()
         raise
     except Exception as e:
+        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete entity: {str(e)}")
 
 
@@ -309,16 +712,12 @@ async def delete_column(table_name: str, column_name: str):
         cur = conn.cursor()
         
         # Check if table exists
-        cur.execute("SELECT EXISTS(SELECT 1 FROM information_schema.tables WHERE table_name = %s)", (table_name,))
-        if not cur.fetchone()[0]:
+        table = schema_catalog.table(cur, table_name)
+        if table is None:
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
 
         # Check if column exists
-        cur.execute("""
-            SELECT EXISTS(SELECT 1 FROM information_schema.columns 
-            WHERE table_name = %s AND column_name = %s)
-        """, (table_name, column_name))
-        if not cur.fetchone()[0]:
+        if not table.has_column(column_name):
             raise HTTPException(status_code=404, detail=f"Column '{column_name}' not found in table '{table_name}'.")
 
         # Drop column
@@ -327,7 +726,9 @@ async def delete_column(table_name: str, column_name: str):
             col=sql.Identifier(column_name)
         )
         cur.execute(drop_stmt)
+        schema_catalog.notify(cur, table_name)
         conn.commit()
+        schema_catalog.invalidate(table_name)
         cur.close()
 
         return {
@@ -337,8 +738,10 @@ async def delete_column(table_name: str, column_name: str):
             "column_deleted": column_name
         }
     except HTTPException:
+        conn.rollback()
         raise
     except Exception as e:
+        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete column: {str(e)}")
 
 @app.put("/rename-column/{table_name}/{old_name}/{new_name}", response_model=dict)
@@ -352,7 +755,9 @@ async def rename_column(table_name: str, old_name: str, new_name: str):
             new_col=sql.Identifier(new_name)
         )
         cur.execute(rename_stmt)
+        schema_catalog.notify(cur, table_name)
         conn.commit()
+        schema_catalog.invalidate(table_name)
         cur.close()
         
         return {
@@ -374,32 +779,28 @@ async def get_entity_info(table_name: str):
         cur = conn.cursor()
         
         # Check if table exists and get column info
-        cur.execute("""
-            SELECT column_name, data_type, is_nullable 
-            FROM information_schema.columns 
-            WHERE table_name = %s 
-            ORDER BY ordinal_position
-        """, (table_name,))
-        
-        columns = cur.fetchall()
-        if not columns:
+        table = schema_catalog.table(cur, table_name)
+        if table is None:
             raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found.")
 
         # Get row count
         cur.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(table_name)))
         row_count = cur.fetchone()[0]
         cur.close()
+        conn.rollback()   # read-only: don't leave the shared connection idle in transaction
 
         return {
             "success": True,
             "table_name": table_name,
-            "columns": [{"name": col[0], "type": col[1], "nullable": col[2]} for col in columns],
-            "column_count": len(columns),
+            "columns": [{"name": col[0], "type": col[1], "nullable": col[2]} for col in table.columns],
+            "column_count": len(table.columns),
             "row_count": row_count
         }
     except HTTPException:
+        conn.rollback()
         raise
     except Exception as e:
+        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to get entity info: {str(e)}")
 
 
@@ -408,14 +809,96 @@ async def get_entity_info(table_name: str):
 
 
 
+def entity_schema(cur, table_name: str) -> TableSchema:
+    """Catalog entry of an entity table; 404 for unknown or system tables."""
+    if table_name in SYSTEM_TABLES:
+        raise HTTPException(status_code=404, detail=f"Entity '{table_name}' not found.")
+    table = schema_catalog.table(cur, table_name)
+    if table is None:
+        raise HTTPException(status_code=404, detail=f"Entity '{table_name}' not found.")
+    return table
+
+
+@app.get("/entities/{table_name}/export")
+async def export_entity(table_name: str, export_format: str = Query("csv", alias="format")):
+    """
+    Download all rows of an entity as CSV, NDJSON or Parquet.
+
+    Rows are read in batches from a server-side cursor and encoded batch by batch into a
+    chunked response, so even multi-million-row tables export in constant memory.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    cur = conn.cursor()
+    try:
+        columns = entity_schema(cur, table_name).column_types
+    finally:
+        cur.close()
+        # A catalog refresh opens a transaction on the shared connection: end it
+        conn.rollback()
+
+    try:
+        chunks = export_chunks(export_format, new_connection, table_name, columns)
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table_name}.{extension}"'}
+    )
+
+
+@app.get("/entities/{table_name}/rows", response_model=dict)
+async def get_entity_rows(
+    table_name: str,
+    http_request: Request,
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    filters: List[str] = Query([], alias="filter", description="column:op:value, op one of eq, ne, lt, lte, gt, gte, in, contains, startswith, null, notnull"),
+    sort: Optional[str] = Query(None, description="Indexed column to sort on, '-' prefix for descending"),
+    after: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """
+    Browse an entity's rows a page at a time.
+
+    Pages are keyset-paginated: `after` carries the last row's sort value and id, so the
+    database seeks straight to the next page instead of skipping OFFSET rows. A cursor is
+    only valid with the `sort` it was issued for. `sort` takes `id` or a column that leads a
+    btree index - for entities made with /save-entity, the attributes saved with `indexed: true`.
+    """
+    cur = conn.cursor()
+    try:
+        table = entity_schema(cur, table_name)
+        try:
+            query = RowsQuery(table_name, table.column_types, table.indexed,
+                              select=columns, filters=filters, sort=sort, cursor=after, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        statement, params = query.build()
+        cur.execute(statement, params)
+        page = query.page(cur.fetchall())
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch rows: {str(e)}")
+    finally:
+        cur.close()
+        # Read-only: end the transaction the lookup and the query opened on the shared connection
+        conn.rollback()
+
+    return json_response({"success": True, "table_name": table_name, **page}, http_request)
+
+
 def generate_mapping_name(entity_name: str, url: str) -> str:
     # Always parse a plain string
     host = (urlparse(str(url)).hostname or "unknown").split('.')[0]
     return f"{entity_name}_{host}_mapping".lower()
 
 @app.post("/save-source", response_model=dict)
-async def save_source(name: str, url: str):
-    """Save a website source in 'sources' table or reuse if it already exists."""
+async def save_source(name: str, url: str, max_response_bytes: Optional[int] = None):
+    """Save a website source in 'sources' table or reuse if it already exists.
+    max_response_bytes lowers the page size cap (FETCH_MAX_BYTES) for this source."""
     cur = conn.cursor()
     try:
         name = name.strip()
@@ -428,7 +911,8 @@ async def save_source(name: str, url: str):
             CREATE TABLE IF NOT EXISTS sources (
                 id SERIAL PRIMARY KEY,
                 name TEXT UNIQUE NOT NULL,
-                url TEXT NOT NULL
+                url TEXT NOT NULL,
+                max_response_bytes INT
             );
         """)
 
@@ -437,6 +921,9 @@ async def save_source(name: str, url: str):
         existing = cur.fetchone()
         if existing:
             existing_id = existing[0]
+            if max_response_bytes is not None:
+                cur.execute("UPDATE sources SET max_response_bytes = %s WHERE id = %s;", (max_response_bytes, existing_id))
+                conn.commit()
             return {
                 "success": True,
                 "id": existing_id,
@@ -445,8 +932,8 @@ async def save_source(name: str, url: str):
 
         # 3️⃣ Insert a new source
         cur.execute(
-            "INSERT INTO sources (name, url) VALUES (%s, %s) RETURNING id;",
-            (name, url)
+            "INSERT INTO sources (name, url, max_response_bytes) VALUES (%s, %s, %s) RETURNING id;",
+            (name, url, max_response_bytes)
         )
         new_id = cur.fetchone()[0]
         conn.commit()
@@ -498,6 +985,9 @@ async def save_entity_mapping(mapping: MappingFormRequest):
                 CONSTRAINT unique_entity_source UNIQUE (entity_name, source_id)
             );
         """)
+        cur.execute("ALTER TABLE entity_mappings ADD COLUMN IF NOT EXISTS detail_mapping JSONB;")
+        cur.execute("ALTER TABLE entity_mappings ADD COLUMN IF NOT EXISTS api_binding JSONB;")
+        cur.execute("ALTER TABLE entity_mappings ADD COLUMN IF NOT EXISTS structured_type TEXT;")
 
         saved_mappings = []
 
@@ -507,22 +997,27 @@ async def save_entity_mapping(mapping: MappingFormRequest):
             if not entity_name:
                 raise HTTPException(status_code=400, detail="Entity name cannot be empty.")
 
-            if not em.field_mappings:
+            if not em.field_mappings and not em.api_binding:
                 raise HTTPException(status_code=400, detail=f"No field mappings for {entity_name}.")
 
             #  Check entity table exists
-            cur.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables WHERE table_name = %s
-                )
-            """, (entity_name,))
-            if not cur.fetchone()[0]:
+            table = schema_catalog.table(cur, entity_name)
+            if table is None:
                 raise HTTPException(status_code=400, detail=f"Entity table '{entity_name}' does not exist.")
 
             #  Validate field mapping keys
-            cur.execute("SELECT column_name FROM information_schema.columns WHERE table_name = %s", (entity_name,))
-            existing_columns = {row[0] for row in cur.fetchall()}
-            invalid = [field for field in em.field_mappings.keys() if field not in existing_columns]
+            existing_columns = set(table.column_names)
+            mapped_fields = list(em.field_mappings.keys())
+            if em.api_binding:
+                mapped_fields += list(em.api_binding.field_paths.keys())
+            if em.detail_mapping:
+                if em.detail_mapping.link_field not in em.field_mappings:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Detail link field '{em.detail_mapping.link_field}' is not mapped for '{entity_name}'."
+                    )
+                mapped_fields += list(em.detail_mapping.field_mappings.keys())
+            invalid = [field for field in mapped_fields if field not in existing_columns]
             if invalid:
                 raise HTTPException(
                     status_code=400,
@@ -534,20 +1029,28 @@ async def save_entity_mapping(mapping: MappingFormRequest):
                 key: {"selector": fm.selector, "extract": fm.extract}
                 for key, fm in em.field_mappings.items()
             }
+            detail_serialized = em.detail_mapping.model_dump() if em.detail_mapping else None
+            api_serialized = em.api_binding.model_dump(mode="json") if em.api_binding else None
             mapping_name = f"{entity_name}-{mapping.source}-mapping"  # Simple unique name pattern
 
 
             # 💾 Insert or update mapping
             cur.execute("""
-                INSERT INTO entity_mappings (entity_name, source_id, mapping_name, container_selector, field_mappings)
-                VALUES (%s, %s, %s, %s, %s)
+                INSERT INTO entity_mappings (entity_name, source_id, mapping_name, container_selector, field_mappings, detail_mapping, api_binding, structured_type)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
                 ON CONFLICT (entity_name, source_id)
                 DO UPDATE SET
                     container_selector = EXCLUDED.container_selector,
                     field_mappings = EXCLUDED.field_mappings,
+                    detail_mapping = EXCLUDED.detail_mapping,
+                    api_binding = EXCLUDED.api_binding,
+                    structured_type = EXCLUDED.structured_type,
                     created_at = NOW()
                 RETURNING id;
-            """, (entity_name, source_id, mapping_name, em.container_selector, Json(serialized)))
+            """, (entity_name, source_id, mapping_name, em.container_selector, Json(serialized),
+                  Json(detail_serialized) if detail_serialized else None,
+                  Json(api_serialized) if api_serialized else None,
+                  em.structured_type))
 
             mapping_id = cur.fetchone()[0]
             saved_mappings.append({
@@ -578,45 +1081,23 @@ async def get_all_entities():
     """
     try:
         cur = conn.cursor()
-        
-        # Get all user-created tables (excluding system tables)
-        cur.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public' 
-            AND table_type = 'BASE TABLE'
-            AND table_name NOT IN ('entity_mappings','sources')
-            ORDER BY table_name
-        """)
-        
-        table_names = [row[0] for row in cur.fetchall()]
-        entities = []
-        
-        for table_name in table_names:
-            # Get columns for each table
-            cur.execute("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = %s 
-                AND table_schema = 'public'
-                ORDER BY ordinal_position
-            """, (table_name,))
-            
-            columns = [row[0] for row in cur.fetchall()]
-            
-            entities.append(EntityInfo(
-                name=table_name,
-                columns=columns
-            ))
-        
+        # All user-created tables (excluding system tables), from the cached schema catalog
+        tables = schema_catalog.tables(cur)
         cur.close()
-        
+        conn.rollback()   # read-only: don't leave the shared connection idle in transaction
+
+        entities = [
+            EntityInfo(name=name, columns=tables[name].column_names)
+            for name in sorted(tables) if name not in SYSTEM_TABLES
+        ]
+
         return EntitiesListResponse(
             total_entities=len(entities),
             entities=entities
         )
         
     except Exception as e:
+        conn.rollback()
         print(f"Error fetching entities: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch entities: {str(e)}")
 
@@ -639,7 +1120,10 @@ async def get_all_mappings():
            em.created_at,
            em.source_id,
            s.name AS source_name,
-           s.url  AS source_url
+           s.url  AS source_url,
+           em.detail_mapping,
+           em.api_binding,
+           em.structured_type
     FROM entity_mappings em
     JOIN sources s
       ON em.source_id = s.id
@@ -660,7 +1144,10 @@ async def get_all_mappings():
                 created_at=row[5],
                 source_id=row[6],
                 source_name=row[7],
-                url=row[8]  # source_url
+                url=row[8],  # source_url
+                detail_mapping=row[9],
+                api_binding=row[10],
+                structured_type=row[11]
 
             ))
         
@@ -721,7 +1208,7 @@ async def get_all_sources():
         cur = conn.cursor()
         # 🗃 Fetch all sources sorted by creation order (id descending for newest first)
         cur.execute("""
-            SELECT id, name, url
+            SELECT id, name, url, max_response_bytes
             FROM sources
             ORDER BY id DESC;
         """)
@@ -734,7 +1221,8 @@ async def get_all_sources():
             sources.append(SourceInfo(
                 id=row[0],
                 name=row[1],
-                url=row[2]
+                url=row[2],
+                max_response_bytes=row[3]
             ))
 
         return SourcesListResponse(
@@ -996,6 +1484,389 @@ async def update_task(task_id: int, request: TaskUpdateRequest):
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update task: {str(e)}")
     
+def persist_rows(cur, entity_name: str, rows) -> Tuple[int, List[int]]:
+    """
+    Insert scraped rows into the entity table, keeping only keys that are table columns.
+    Returns the number of rows saved and the indexes of rows skipped because a value didn't
+    fit its column (e.g. text scraped into an INTEGER column).
+    """
+    if not rows:
+        return 0, []
+
+    table = schema_catalog.table(cur, entity_name)
+    table_columns = set(table.column_names if table else ()) - {"id"}
+
+    buffer = as_columnar(rows)
+    columns = [c for c in buffer.column_names if c in table_columns]
+    if not columns:
+        return 0, []
+
+    # COPY straight from the columns; empty strings become NULL so non-text columns accept missing values
+    copy_stmt = sql.SQL("COPY {table} ({cols}) FROM STDIN").format(
+        table=sql.Identifier(entity_name),
+        cols=sql.SQL(", ").join(sql.Identifier(c) for c in columns)
+    ).as_string(cur)
+    cur.execute("SAVEPOINT persist_rows")
+    try:
+        cur.copy_expert(copy_stmt, buffer.copy_stream(columns))
+        cur.execute("RELEASE SAVEPOINT persist_rows")
+        return len(buffer), []
+    except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+        cur.execute("ROLLBACK TO SAVEPOINT persist_rows")
+        logger.warning(f"COPY into {entity_name} rejected a value, saving row by row: {e}")
+
+    # One bad value must not cost the whole batch: each row gets its own savepoint
+    skipped = []
+    for index in range(len(buffer)):
+        cur.execute("SAVEPOINT persist_row")
+        try:
+            cur.copy_expert(copy_stmt, buffer.take([index]).copy_stream(columns))
+            cur.execute("RELEASE SAVEPOINT persist_row")
+        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+            cur.execute("ROLLBACK TO SAVEPOINT persist_row")
+            logger.warning(f"Skipping {entity_name} row {index}: {e}")
+            skipped.append(index)
+    cur.execute("RELEASE SAVEPOINT persist_rows")
+    return len(buffer) - len(skipped), skipped
+
+
+def ensure_task_run_tables(cur):
+    """Create the bookkeeping tables used by task runs."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS task_runs (
+            id SERIAL PRIMARY KEY,
+            task_id INT REFERENCES tasks(id) ON DELETE CASCADE,
+            started_at TIMESTAMP NOT NULL,
+            finished_at TIMESTAMP DEFAULT NOW(),
+            status TEXT NOT NULL,
+            items_saved INT DEFAULT 0,
+            message TEXT
+        );
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS page_fingerprints (
+            task_id INT REFERENCES tasks(id) ON DELETE CASCADE,
+            url TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT NOW(),
+            PRIMARY KEY (task_id, url)
+        );
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS page_simhashes (
+            entity_name TEXT NOT NULL,
+            url TEXT NOT NULL,
+            simhash BIGINT NOT NULL,
+            band0 INT NOT NULL,
+            band1 INT NOT NULL,
+            band2 INT NOT NULL,
+            band3 INT NOT NULL,
+            seen_at TIMESTAMP DEFAULT NOW(),
+            PRIMARY KEY (entity_name, url)
+        );
+        CREATE INDEX IF NOT EXISTS page_simhashes_band0 ON page_simhashes (entity_name, band0);
+        CREATE INDEX IF NOT EXISTS page_simhashes_band1 ON page_simhashes (entity_name, band1);
+        CREATE INDEX IF NOT EXISTS page_simhashes_band2 ON page_simhashes (entity_name, band2);
+        CREATE INDEX IF NOT EXISTS page_simhashes_band3 ON page_simhashes (entity_name, band3);
+    """)
+
+
+def load_task(cur, task_id: int):
+    """Return (task_name, ScrapeRequest) for a task, or raise 404."""
+    cur.execute("""
+        SELECT t.task_name, s.url, em.entity_name, em.container_selector,
+               em.field_mappings, em.detail_mapping, em.api_binding, em.structured_type,
+               s.max_response_bytes
+        FROM tasks t
+        JOIN sources s ON t.source_id = s.id
+        JOIN entity_mappings em ON t.mapping_id = em.id
+        WHERE t.id = %s
+    """, (task_id,))
+    task = cur.fetchone()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    task_name, url, entity_name, container_selector, field_mappings, detail_mapping, api_binding, structured_type, max_bytes = task
+    request = ScrapeRequest(
+        entity_name=entity_name,
+        url=url,
+        container_selector=container_selector,
+        field_mappings=field_mappings,
+        detail_mapping=detail_mapping,
+        api_binding=api_binding,
+        structured_type=structured_type,
+        max_bytes=max_bytes
+    )
+    return task_name, request
+
+
+async def scrape_task_page(cur, task_id: int, request: ScrapeRequest, seen_urls=None) -> dict:
+    """
+    Scrape one page of a task and insert its rows.
+    Unchanged pages and near-duplicates of other URLs are skipped before parsing.
+    """
+    url = str(request.url)
+    html = None
+    fingerprint = None
+    page_hash = None
+    if not request.api_binding:
+        html = await fetch_html(url, request.timeout, request.max_bytes)
+
+        # Unchanged pages (ignoring tokens/timestamps) skip parsing, extraction and DB writes,
+        # unless the mapping changed since the page was last extracted
+        fingerprint = content_fingerprint(html, mapping_fingerprint(request))
+        cur.execute(
+            "SELECT fingerprint FROM page_fingerprints WHERE task_id = %s AND url = %s",
+            (task_id, url)
+        )
+        previous = cur.fetchone()
+        if previous and previous[0] == fingerprint:
+            return {"status": "unchanged", "items_saved": 0, "message": "Page unchanged since the last run"}
+
+        # Syndicated copies of a page already processed for this entity under another URL (another
+        # source, a mirror domain) are skipped too; pages with too little text to compare are
+        # always extracted
+        page_hash = simhash(main_text(html), min_shingles=SIMHASH_MIN_SHINGLES)
+        if page_hash is not None:
+            page_bands = bands(page_hash)
+            cur.execute("""
+                SELECT url, simhash FROM page_simhashes
+                WHERE entity_name = %s AND url <> %s
+                AND seen_at > NOW() - make_interval(hours => %s)
+                AND (band0 = %s OR band1 = %s OR band2 = %s OR band3 = %s)
+            """, (request.entity_name, url, SIMHASH_WINDOW_HOURS, *page_bands))
+            duplicate_of = next(
+                (other_url for other_url, other_hash in cur.fetchall()
+                 if hamming_distance(page_hash, from_signed(other_hash)) <= SIMHASH_MAX_DISTANCE),
+                None
+            )
+            if duplicate_of:
+                return {"status": "duplicate", "items_saved": 0, "message": f"Page is a near-duplicate of {duplicate_of}"}
+
+    # The rows go to COPY straight from the extraction buffer, never as dicts
+    rows, failure = await extract_static_rows(request, seen_urls, html)
+    if failure:
+        return {"status": "failed", "items_saved": 0, "message": failure}
+
+    items_saved, skipped = persist_rows(cur, request.entity_name, rows)
+
+    if fingerprint:
+        cur.execute("""
+            INSERT INTO page_fingerprints (task_id, url, fingerprint)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (task_id, url)
+            DO UPDATE SET fingerprint = EXCLUDED.fingerprint, updated_at = NOW()
+        """, (task_id, url, fingerprint))
+    if page_hash is not None:
+        cur.execute("""
+            INSERT INTO page_simhashes (entity_name, url, simhash, band0, band1, band2, band3)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (entity_name, url)
+            DO UPDATE SET simhash = EXCLUDED.simhash, band0 = EXCLUDED.band0, band1 = EXCLUDED.band1,
+                          band2 = EXCLUDED.band2, band3 = EXCLUDED.band3, seen_at = NOW()
+        """, (request.entity_name, url, to_signed(page_hash), *page_bands))
+
+    message = f"Successfully scraped {len(rows)} {request.entity_name} items"
+    if skipped:
+        message += f"; skipped {len(skipped)} rows with values that don't fit their columns (rows {', '.join(map(str, skipped[:20]))})"
+    return {"status": "success", "items_saved": items_saved, "message": message}
+
+
+def is_transient_page_error(error: Exception) -> bool:
+    """Timeouts, 5xx and exhausted retries are worth another run; other failures won't change."""
+    if isinstance(error, HTTPException):
+        return error.status_code >= 500
+    return is_transient(error)
+
+
+@app.post("/run-task/{task_id}", response_model=dict)
+async def run_task(task_id: int):
+    """
+    Run a task now: scrape its source with its mapping and save the rows into the entity table.
+    Pages queued by /discover-urls for this task are scraped in the same run.
+    """
+    # The run's transaction stays open across fetches: it gets its own connection so other
+    # requests' commits and rollbacks on the shared one can't end it (or its savepoints) mid-run
+    run_conn = new_connection()
+    cur = run_conn.cursor()
+    started_at = datetime.now()
+    try:
+        ensure_task_run_tables(cur)
+        task_name, request = load_task(cur, task_id)
+        # Frontiers live in SQLite files: open and update them off the event loop
+        loop = asyncio.get_running_loop()
+
+        # Detail pages fetched by earlier runs are not fetched again
+        seen_urls = None
+        if request.detail_mapping:
+            details_frontier = await loop.run_in_executor(None, get_frontier, f"{request.entity_name}_details")
+            seen_urls = details_frontier.run()
+
+        result = await scrape_task_page(cur, task_id, request, seen_urls)
+        items_saved = result["items_saved"]
+        message = result["message"]
+
+        # Pages discovered from the source's sitemap since the last run. They stay queued until
+        # the run commits, and each runs in a savepoint so one failing page can't abort the rest
+        page_frontier = await loop.run_in_executor(None, get_frontier, f"task_{task_id}_pages")
+        queued_pages = await loop.run_in_executor(None, page_frontier.peek, SITEMAP_PAGES_PER_RUN)
+        processed_pages = []
+        failed_pages = 0
+        for page_url in queued_pages:
+            cur.execute("SAVEPOINT queued_page")
+            if seen_urls:
+                seen_urls.savepoint()
+            try:
+                page_request = request.model_copy(update={"url": page_url, "api_binding": None})
+                page_result = await scrape_task_page(cur, task_id, page_request, seen_urls)
+                cur.execute("RELEASE SAVEPOINT queued_page")
+            except Exception as e:
+                cur.execute("ROLLBACK TO SAVEPOINT queued_page")
+                if seen_urls:
+                    seen_urls.rollback()
+                if is_transient_page_error(e):
+                    logger.warning(f"Queued page {page_url} failed, left queued: {e}")
+                    continue
+                # 404s, robots.txt blocks, rejected bodies... would fail every run and hold the
+                # head of the queue, so they are acknowledged as failed
+                logger.warning(f"Queued page {page_url} failed permanently: {e}")
+                processed_pages.append(page_url)
+                failed_pages += 1
+                continue
+            processed_pages.append(page_url)
+            items_saved += page_result["items_saved"]
+            if page_result["status"] == "failed":
+                failed_pages += 1
+        requeued_pages = len(queued_pages) - len(processed_pages)
+        if queued_pages:
+            message = (f"{message}; {len(processed_pages)} of {len(queued_pages)} discovered pages processed"
+                       f" ({failed_pages} failed, {requeued_pages} left queued after errors)")
+
+        status = result["status"]
+        if status != "failed" and (failed_pages or requeued_pages):
+            status = "partial"
+        cur.execute("""
+            INSERT INTO task_runs (task_id, started_at, status, items_saved, message)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (task_id, started_at, status, items_saved, message))
+        run_conn.commit()
+        # Acknowledged only now: pages of a run that rolls back are scraped again next time
+        await loop.run_in_executor(None, page_frontier.add_many, processed_pages)
+        if seen_urls:
+            await loop.run_in_executor(None, seen_urls.commit)
+
+        return {
+            "success": status != "failed",
+            "task_name": task_name,
+            "status": status,
+            "items_saved": items_saved,
+            "detail_pages_fetched": len(seen_urls.fetched) if seen_urls else 0,
+            "discovered_pages_processed": len(processed_pages),
+            "discovered_pages_failed": failed_pages,
+            "discovered_pages_requeued": requeued_pages,
+            "message": message
+        }
+
+    except HTTPException:
+        run_conn.rollback()
+        raise
+    except Exception as e:
+        run_conn.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to run task: {str(e)}")
+    finally:
+        cur.close()
+        run_conn.close()
+
+
+@app.post("/discover-urls/{task_id}", response_model=dict)
+async def discover_urls(task_id: int, request: SitemapDiscoveryRequest):
+    """
+    Queue pages from the source's sitemap (or sitemap index) for the task's next run.
+    Only URLs matching url_pattern and modified since the task's last run are queued,
+    so new leads are found without crawling the whole site.
+    """
+    if request.url_pattern:
+        try:
+            re.compile(request.url_pattern)
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid url_pattern: {e}")
+    cur = conn.cursor()
+    try:
+        ensure_task_run_tables(cur)
+        _, task_request = load_task(cur, task_id)
+
+        source = urlparse(str(task_request.url))
+        sitemap_url = str(request.sitemap_url) if request.sitemap_url else f"{source.scheme}://{source.netloc}/sitemap.xml"
+
+        cur.execute("""
+            SELECT MAX(started_at) FROM task_runs
+            WHERE task_id = %s AND status <> 'failed'
+        """, (task_id,))
+        since = None if request.full else cur.fetchone()[0]
+        conn.commit()
+
+        discovered = []
+        failed_sitemaps = []
+        try:
+            async for page_url, lastmod in discover_sitemap_urls(sitemap_url, since, request.url_pattern,
+                                                                 request.max_urls, failed_sitemaps=failed_sitemaps):
+                discovered.append((page_url, lastmod))
+        except SitemapError as e:
+            # Unreachable or broken - not the same as a sitemap with nothing new in it
+            raise HTTPException(status_code=502, detail=str(e))
+
+        def queue_pages() -> int:
+            page_frontier = get_frontier(f"task_{task_id}_pages")
+            queued = 0
+            for page_url, lastmod in discovered:
+                try:
+                    if since and lastmod:
+                        # Known to have changed since the last run - scrape it again even if seen before
+                        page_frontier.requeue(page_url)
+                        queued += 1
+                    elif page_frontier.push(page_url):
+                        queued += 1
+                except ValueError as e:
+                    logger.warning(f"Skipping malformed sitemap URL {page_url}: {e}")
+            return queued
+
+        # The frontier is a SQLite file - queue the pages off the event loop
+        queued = await asyncio.get_running_loop().run_in_executor(None, queue_pages)
+        discovered = len(discovered)
+
+        return {
+            "success": True,
+            "sitemap_url": sitemap_url,
+            "since": since,
+            "discovered": discovered,
+            "queued": queued,
+            "failed_sitemaps": len(failed_sitemaps),
+            "message": f"Queued {queued} of {discovered} sitemap URLs for task {task_id}"
+                       + (f" ({len(failed_sitemaps)} child sitemaps failed)" if failed_sitemaps else "")
+        }
+
+    except HTTPException:
+        conn.rollback()
+        raise
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to discover URLs: {str(e)}")
+    finally:
+        cur.close()
+
+
+@app.get("/proxies", response_model=dict)
+async def get_proxies():
+    """Health scores of the egress proxy pool (empty when PROXY_URLS is not set)."""
+    return {"success": True, "proxies": proxy_pool.stats()}
+
+
+@app.get("/browsers", response_model=dict)
+async def get_browsers():
+    """Pooled dynamic-scrape browsers with their page counts, age and memory."""
+    return {"success": True, "browsers": browser_pool.stats(), "admission": render_admission.stats()}
+
+
 @app.get("/")
 async def root():
     return {
@@ -0,0 +1,176 @@
+import io
+import os
+import csv
+import uuid
+import logging
+from typing import Callable, Iterator, List, Tuple
+from psycopg2 import sql
+from fast_json import dumps
+
+# Optional: Parquet export needs pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "5000"))
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def fetch_batches(connect: Callable, table: str, columns: List[str],
+                  batch_size: int = EXPORT_BATCH_ROWS) -> Iterator[List[tuple]]:
+    """
+    Yield the table's rows in batches from a named (server-side) cursor, so only one batch
+    is ever held in memory. The export gets its own connection: a named cursor lives in a
+    transaction, which the shared connection's commits would end mid-stream.
+    """
+    conn = connect()
+    try:
+        conn.set_session(readonly=True)
+        with conn.cursor(name=f"export_{uuid.uuid4().hex}") as cur:
+            cur.itersize = batch_size
+            query = sql.SQL("SELECT {cols} FROM {table}").format(
+                cols=sql.SQL(", ").join(sql.Identifier(c) for c in columns),
+                table=sql.Identifier(table)
+            )
+            if "id" in columns:
+                query += sql.SQL(" ORDER BY id")
+            cur.execute(query)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+    finally:
+        conn.close()
+
+
+def is_json_type(data_type: str) -> bool:
+    """json, jsonb and array columns: psycopg2 hands back Python objects, exported as JSON text."""
+    return data_type in ("json", "jsonb", "ARRAY") or data_type.endswith("[]")
+
+
+def csv_chunks(columns: List[Tuple[str, str]], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    json_indexes = [i for i, (_, data_type) in enumerate(columns) if is_json_type(data_type)]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for rows in batches:
+        if json_indexes:
+            # JSON text, as the NDJSON and Parquet exports write them - not Python reprs
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i in json_indexes:
+                    if row[i] is not None:
+                        row[i] = dumps(row[i]).decode("utf-8")
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(columns: List[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    for rows in batches:
+        yield b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+# information_schema data types -> Arrow; anything else (numeric, json, ...) is exported as text
+_ARROW_TYPES = {
+    "text": "string", "character varying": "string", "character": "string",
+    "integer": "int32", "bigint": "int64", "smallint": "int16",
+    "boolean": "bool", "real": "float32", "double precision": "float64",
+    "date": "date32", "timestamp without time zone": "timestamp",
+    "timestamp with time zone": "timestamptz",
+}
+
+
+def arrow_schema(columns: List[Tuple[str, str]]):
+    fields = []
+    for name, data_type in columns:
+        kind = _ARROW_TYPES.get(data_type, "string")
+        if kind == "timestamp":
+            arrow_type = pa.timestamp("us")
+        elif kind == "timestamptz":
+            arrow_type = pa.timestamp("us", tz="UTC")
+        else:
+            arrow_type = getattr(pa, kind)()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands each written chunk back to the response stream."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def parquet_chunks(columns: List[Tuple[str, str]], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    """One Parquet row group per batch, flushed to the client as soon as it is encoded."""
+    schema = arrow_schema(columns)
+    json_columns = {name for name, data_type in columns if is_json_type(data_type)}
+    text_columns = {name for name, data_type in columns if _ARROW_TYPES.get(data_type, "string") == "string"}
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for rows in batches:
+            data = {}
+            for i, (name, _) in enumerate(columns):
+                values = [row[i] for row in rows]
+                if name in json_columns:
+                    # str() would write Python reprs ({'a': None}); readers expect JSON
+                    values = [None if v is None else dumps(v).decode("utf-8") for v in values]
+                elif name in text_columns:
+                    values = [None if v is None else str(v) for v in values]
+                data[name] = values
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_chunks(export_format: str, connect: Callable, table: str,
+                  columns: List[Tuple[str, str]]) -> Iterator[bytes]:
+    """Encoded export of a table as a stream of byte chunks, in constant memory."""
+    names = [name for name, _ in columns]
+    batches = fetch_batches(connect, table, names)
+    if export_format == "csv":
+        return csv_chunks(columns, batches)
+    if export_format == "ndjson":
+        return ndjson_chunks(names, batches)
+    if export_format == "parquet":
+        if pq is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        return parquet_chunks(columns, batches)
+    raise ValueError(f"Unsupported export format: {export_format}")
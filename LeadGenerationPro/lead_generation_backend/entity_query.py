@@ -0,0 +1,183 @@
+import json
+import base64
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from psycopg2 import sql
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# Filter operators: column:op:value (null / notnull take no value)
+_COMPARISONS = {"eq": "=", "ne": "<>", "lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+_TEXT_OPS = {"contains", "startswith"}
+_NULL_OPS = {"null": "IS NULL", "notnull": "IS NOT NULL"}
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in ("true", "t", "1", "yes"):
+        return True
+    if lowered in ("false", "f", "0", "no"):
+        return False
+    raise ValueError(f"not a boolean: {value}")
+
+
+# information_schema data type -> parser for filter values
+_PARSERS = {
+    "integer": int, "bigint": int, "smallint": int,
+    "real": float, "double precision": float, "numeric": Decimal,
+    "boolean": _parse_bool,
+    "date": date.fromisoformat,
+    "timestamp without time zone": datetime.fromisoformat,
+    "timestamp with time zone": datetime.fromisoformat,
+}
+
+
+def typed_value(data_type: str, value: str) -> Any:
+    """Parse a filter value for its column type; raises ValueError on a mismatch."""
+    parser = _PARSERS.get(data_type, str)
+    try:
+        return parser(value)
+    except (ValueError, ArithmeticError):
+        raise ValueError(f"'{value}' is not a valid {data_type}")
+
+
+def encode_cursor(sort: str, values: List[Any]) -> str:
+    """Opaque cursor for the row after (sort value, id); it records the sort it was issued for."""
+    raw = json.dumps([sort] + list(values), default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """[sort value, id] of a cursor; a cursor issued for another sort would skip or repeat rows."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 3:
+        raise ValueError("Invalid cursor")
+    if values[0] != sort:
+        raise ValueError(f"Cursor was issued for sort '{values[0]}', not '{sort}'")
+    return values[1:]
+
+
+class RowsQuery:
+    """
+    One page of an entity table: projection, typed filters, a sort on an indexed column and
+    keyset pagination. Pages continue from the last row's (sort value, id) instead of an
+    OFFSET, so every page costs an index seek no matter how deep the client has browsed.
+    """
+
+    def __init__(self, table: str, columns: List[Tuple[str, str]], indexed: Iterable[str],
+                 select: Optional[str] = None, filters: Optional[List[str]] = None,
+                 sort: Optional[str] = None, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+        self.table = table
+        self.types: Dict[str, str] = dict(columns)
+        if "id" not in self.types:
+            raise ValueError("Entity has no id column to paginate on")
+
+        self.columns = self._projection(select, [name for name, _ in columns])
+        self.descending = bool(sort and sort.startswith("-"))
+        self.sort_column = (sort or "id").lstrip("-+") or "id"
+        if self.sort_column not in self.types:
+            raise ValueError(f"Unknown sort column '{self.sort_column}'")
+        if self.sort_column != "id" and self.sort_column not in indexed:
+            raise ValueError(f"Sorting is only supported on btree-indexed columns: {', '.join(['id'] + sorted(indexed))}")
+        self.sort = ("-" if self.descending else "") + self.sort_column
+        self.filters = [self._filter(f) for f in (filters or [])]
+        self.after = decode_cursor(cursor, self.sort) if cursor else None
+        self.limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    def _projection(self, select: Optional[str], available: List[str]) -> List[str]:
+        if not select:
+            return available
+        columns = [c.strip() for c in select.split(",") if c.strip()]
+        unknown = [c for c in columns if c not in self.types]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        return columns
+
+    def _filter(self, expression: str) -> Tuple[sql.Composable, List[Any]]:
+        parts = expression.split(":", 2)
+        if len(parts) < 2:
+            raise ValueError(f"Filter must look like column:op:value, got '{expression}'")
+        column, op = parts[0], parts[1].lower()
+        if column not in self.types:
+            raise ValueError(f"Unknown filter column '{column}'")
+        ident = sql.Identifier(column)
+
+        if op in _NULL_OPS:
+            return sql.SQL("{} " + _NULL_OPS[op]).format(ident), []
+        if len(parts) != 3:
+            raise ValueError(f"Filter '{expression}' needs a value")
+        value = parts[2]
+        if op in _COMPARISONS:
+            return sql.SQL("{} " + _COMPARISONS[op] + " %s").format(ident), [typed_value(self.types[column], value)]
+        if op == "in":
+            values = [typed_value(self.types[column], v) for v in value.split(",")]
+            return sql.SQL("{} = ANY(%s)").format(ident), [values]
+        if op in _TEXT_OPS:
+            escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%" if op == "contains" else f"{escaped}%"
+            return sql.SQL("{}::text ILIKE %s").format(ident), [pattern]
+        raise ValueError(f"Unknown filter operator '{op}'")
+
+    def _keyset(self) -> Tuple[sql.Composable, List[Any]]:
+        """Rows after the cursor in (sort column NULLS LAST, id) order."""
+        last_value, last_id = self.after
+        sort, row_id = sql.Identifier(self.sort_column), sql.Identifier("id")
+        op = "<" if self.descending else ">"
+        if self.sort_column == "id":
+            return sql.SQL("{} " + op + " %s").format(row_id), [last_id]
+        if last_value is None:
+            # Already in the NULL tail of the sort column
+            return sql.SQL("({} IS NULL AND {} " + op + " %s)").format(sort, row_id), [last_id]
+        return (sql.SQL("(({}, {}) " + op + " (%s, %s) OR {} IS NULL)").format(sort, row_id, sort),
+                [last_value, last_id])
+
+    def build(self) -> Tuple[sql.Composed, List[Any]]:
+        conditions, params = [], []
+        for condition, values in self.filters:
+            conditions.append(condition)
+            params.extend(values)
+        if self.after is not None:
+            condition, values = self._keyset()
+            conditions.append(condition)
+            params.extend(values)
+
+        # id and the sort column are always fetched, the cursor is built from them
+        fetched = list(dict.fromkeys(self.columns + [self.sort_column, "id"]))
+        direction = sql.SQL("DESC" if self.descending else "ASC")
+        query = sql.SQL("SELECT {cols} FROM {table}").format(
+            cols=sql.SQL(", ").join(sql.Identifier(c) for c in fetched),
+            table=sql.Identifier(self.table)
+        )
+        if conditions:
+            query += sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions)
+        if self.sort_column == "id":
+            query += sql.SQL(" ORDER BY id {}").format(direction)
+        else:
+            query += sql.SQL(" ORDER BY {} {} NULLS LAST, id {}").format(
+                sql.Identifier(self.sort_column), direction, direction)
+        query += sql.SQL(" LIMIT %s")
+        params.append(self.limit + 1)   # one extra row tells whether there is a next page
+        self.fetched = fetched
+        return query, params
+
+    def page(self, records: List[tuple]) -> dict:
+        has_more = len(records) > self.limit
+        records = records[:self.limit]
+        rows = [dict(zip(self.fetched, record)) for record in records]
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = encode_cursor(self.sort, [last[self.sort_column], last["id"]])
+        return {
+            "columns": self.columns,
+            "rows": [{c: row[c] for c in self.columns} for row in rows],
+            "has_more": has_more,
+            "next_cursor": next_cursor
+        }
+
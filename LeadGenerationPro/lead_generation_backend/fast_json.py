@@ -0,0 +1,72 @@
+import os
+import json
+import gzip
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+# orjson serializes rows several times faster than the std encoder; brotli compresses
+# better than gzip. Both are optional and fall back to the standard library.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return dict(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)         # DECIMAL entity columns, as FastAPI's encoder does
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes. Models are dumped field by field, without re-validation."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _accepted_encodings(request: Request) -> set:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(name.lower())
+    return accepted
+
+
+def json_response(content: Any, request: Optional[Request] = None, status_code: int = 200) -> Response:
+    """
+    Serialize a large result directly (FastAPI's response_model validation is skipped for
+    returned Responses) and compress it with brotli or gzip when the client accepts it.
+    """
+    body = dumps(content)
+    headers = {}
+    if request is not None and len(body) >= COMPRESS_MIN_BYTES:
+        accepted = _accepted_encodings(request)
+        if brotli is not None and "br" in accepted:
+            body, headers["Content-Encoding"] = brotli.compress(body, quality=4), "br"
+        elif "gzip" in accepted:
+            body, headers["Content-Encoding"] = gzip.compress(body, compresslevel=5), "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
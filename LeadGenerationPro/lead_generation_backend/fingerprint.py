@@ -0,0 +1,64 @@
+import re
+import json
+import hashlib
+
+# Parts of a page that change on every request without the content changing
+VOLATILE_PATTERNS = [
+    # CSRF / nonce tokens in hidden inputs and meta tags
+    re.compile(r'<input[^>]*name=["\'][^"\']*(csrf|token|nonce|authenticity)[^"\']*["\'][^>]*>', re.IGNORECASE),
+    re.compile(r'<meta[^>]*name=["\'][^"\']*(csrf|token|nonce)[^"\']*["\'][^>]*>', re.IGNORECASE),
+    re.compile(r'\snonce=["\'][^"\']*["\']', re.IGNORECASE),
+    # HTML comments (build ids, render timings)
+    re.compile(r'<!--.*?-->', re.DOTALL),
+    # Inline scripts carry session state, analytics ids and timestamps
+    re.compile(r'<script(?![^>]*application/ld\+json)[^>]*>.*?</script\s*>', re.IGNORECASE | re.DOTALL),
+    # Cache-busting query strings on assets
+    re.compile(r'([?&](v|ver|version|t|ts|_|cb|cachebust)=)[\w.-]+', re.IGNORECASE),
+]
+
+# Applied inside tags only: page text (opening hours, phone numbers) is content, even when it
+# looks like a time or an epoch
+_TAG = re.compile(r'<[a-zA-Z][^>]*>')
+VOLATILE_MARKUP_PATTERNS = [
+    # Attributes holding render timestamps, request/session ids or build ids
+    re.compile(r'\sdata-[\w-]*?(timestamp|ts|rendered|generated|request-?id|session|build|nonce|token)[\w-]*'
+               r'=("[^"]*"|\'[^\']*\'|[^\s>]+)', re.IGNORECASE),
+    # Full ISO timestamps in attribute values (<meta content>, <time datetime>, modified dates)
+    re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?'),
+]
+
+# The ScrapeRequest fields that decide what is extracted from a page
+MAPPING_FIELDS = ("container_selector", "field_mappings", "detail_mapping", "api_binding", "structured_type")
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _strip_markup(match: re.Match) -> str:
+    tag = match.group(0)
+    for pattern in VOLATILE_MARKUP_PATTERNS:
+        tag = pattern.sub(' ', tag)
+    return tag
+
+
+def strip_volatile(html: str) -> str:
+    """Remove tokens, timestamps and other per-request noise from a page body."""
+    for pattern in VOLATILE_PATTERNS:
+        html = pattern.sub(' ', html)
+    html = _TAG.sub(_strip_markup, html)
+    return _WHITESPACE.sub(' ', html).strip()
+
+
+def mapping_fingerprint(request) -> str:
+    """Hash of a request's effective mapping; a changed mapping must re-extract unchanged pages."""
+    mapping = request.model_dump(mode='json', include=set(MAPPING_FIELDS))
+    return hashlib.sha256(json.dumps(mapping, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def content_fingerprint(html: str, mapping: str = '') -> str:
+    """
+    Stable hash of a page body, equal across fetches when only volatile parts changed.
+    `mapping` (see mapping_fingerprint) is folded in, so the same page under a new mapping differs.
+    """
+    digest = hashlib.sha256(mapping.encode('utf-8'))
+    digest.update(strip_volatile(html).encode('utf-8', 'replace'))
+    return digest.hexdigest()
@@ -0,0 +1,138 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_TTL = int(os.getenv("JOB_TTL", "3600"))          # seconds a finished job stays readable
+JOB_MAX = int(os.getenv("JOB_MAX", "1000"))          # jobs kept in memory, oldest finished dropped first
+
+FINISHED = ("succeeded", "failed")
+
+
+class Job:
+    """One submitted scrape: its status, the rows produced so far and a change signal for streams."""
+
+    def __init__(self, mode: str, entity_name: str, url: str):
+        self.id = uuid.uuid4().hex
+        self.mode = mode
+        self.entity_name = entity_name
+        self.url = url
+        self.status = "queued"
+        self.message = "Waiting to start"
+        self.rows: List[Dict[str, Any]] = []
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.finished_monotonic: Optional[float] = None
+        self.version = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def _touch(self):
+        self.version += 1
+        # Wake every stream waiting on this job, then re-arm for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def start(self):
+        self.status, self.message, self.started_at = "running", "Scraping", datetime.now()
+        self._touch()
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]):
+        """Append a batch of rows; called as they arrive, so streams see them before the job ends."""
+        self.rows.extend(rows)
+        self._touch()
+
+    def finish(self, success: bool, message: str):
+        self.status = "succeeded" if success else "failed"
+        self.message = message
+        self.finished_at = datetime.now()
+        self.finished_monotonic = time.monotonic()
+        self._touch()
+
+    async def wait_for_change(self, version: int, timeout: float):
+        """Return once the job changed past `version` (or after `timeout`, for keep-alives)."""
+        if self.version != version:
+            return
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.id,
+            "mode": self.mode,
+            "entity_name": self.entity_name,
+            "url": self.url,
+            "status": self.status,
+            "message": self.message,
+            "total_items": len(self.rows),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobManager:
+    """
+    In-memory registry of scrape jobs run as tasks on the server's event loop.
+
+    Jobs are per process: with several workers, clients must be routed back to the one
+    that accepted the job. Finished jobs expire after `ttl` seconds.
+    """
+
+    def __init__(self, ttl: int = JOB_TTL, max_jobs: int = JOB_MAX):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks = set()
+        self._lock = threading.Lock()
+
+    def _prune(self):
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and (now - job.finished_monotonic > self.ttl or len(self._jobs) > self.max_jobs):
+                del self._jobs[job_id]
+
+    def submit(self, job: Job, work: Callable[[Job], Awaitable[None]]) -> Job:
+        """Register the job and start `work(job)` in the background on the running loop."""
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        task = asyncio.get_running_loop().create_task(self._run(job, work))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable[None]]):
+        job.start()
+        try:
+            await work(job)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed", exc_info=True)
+            job.finish(False, getattr(e, "detail", None) or str(e))
+        if not job.finished:
+            job.finish(True, f"Scraped {len(job.rows)} {job.entity_name} items")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and job.finished and time.monotonic() - job.finished_monotonic > self.ttl:
+            return None
+        return job
+
+
+job_manager = JobManager()
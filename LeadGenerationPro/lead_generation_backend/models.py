@@ -5,7 +5,25 @@ from datetime import datetime
 
 class FieldMapping(BaseModel):
     selector: str
-    extract: str = "text"  # text, href, src, or attribute name
+    extract: str = "text"  # text, href, src, jsonld, or attribute name
+    # with extract "jsonld" the selector is a JSONPath into the page's schema.org item, e.g. "$.telephone"
+
+
+class DetailMapping(BaseModel):
+    link_field: str               # field holding the detail page link, e.g. "company_link"
+    container_selector: Optional[str] = None
+    field_mappings: Dict[str, FieldMapping]
+    max_concurrency: int = 5      # detail pages fetched at once
+    skip_seen: bool = True        # skip detail URLs already crawled in previous task runs
+
+
+class ApiBinding(BaseModel):
+    endpoint: HttpUrl             # JSON endpoint discovered while rendering the page
+    method: str = "GET"
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None    # JSON body for POST endpoints (raw text for form-encoded ones)
+    items_path: str = "$"         # JSONPath to the list of items, e.g. "$.results[*]"
+    field_paths: Dict[str, str]   # field name -> JSONPath relative to one item, e.g. "$.name"
 
 
 class EntityMappingRequest(BaseModel):
@@ -13,6 +31,9 @@ class EntityMappingRequest(BaseModel):
     container_selector: Optional[str] = None
     field_mappings: Dict[str, FieldMapping]
     # key = field name (e.g., "company_name"), value = FieldMapping selector/extract info
+    detail_mapping: Optional[DetailMapping] = None
+    api_binding: Optional[ApiBinding] = None
+    structured_type: Optional[str] = None   # schema.org @type read by jsonld fields, e.g. "LocalBusiness"
 
 class MappingFormRequest(BaseModel):
     source:str
@@ -27,6 +48,20 @@ class ScrapeRequest(BaseModel):
     field_mappings: Dict[str, FieldMapping]
     max_items: Optional[int] = None
     timeout: Optional[int] = 15
+    bypass_cache: bool = False      # always scrape, ignoring cached results
+    max_age: Optional[int] = None   # oldest cached result (seconds) the caller accepts
+    max_bytes: Optional[int] = None  # lower response size cap; FETCH_MAX_BYTES always applies
+    detail_mapping: Optional[DetailMapping] = None
+    api_binding: Optional[ApiBinding] = None
+    structured_type: Optional[str] = None   # schema.org @type read by jsonld fields, e.g. "LocalBusiness"
+
+class JobRequest(BaseModel):
+    mode: str = "static"    # static or dynamic
+    request: ScrapeRequest
+
+class DiscoverApisRequest(BaseModel):
+    url: HttpUrl
+    timeout: Optional[int] = 30
 
 class ScrapeResponse(BaseModel):
     entity_name: str
@@ -40,6 +75,7 @@ class ScrapeResponse(BaseModel):
 class Attribute(BaseModel):
     name: str
     datatype: str   # e.g. "text", "int", "bool"
+    indexed: bool = False   # btree index, so /entities/{table}/rows can sort on it
 
 class EntityRequest(BaseModel):
     name: str   # table name
@@ -61,6 +97,9 @@ class MappingInfo(BaseModel):
     mapping_name: str
     container_selector: Optional[str] = None
     field_mappings: Dict[str, Any]
+    detail_mapping: Optional[Dict[str, Any]] = None
+    api_binding: Optional[Dict[str, Any]] = None
+    structured_type: Optional[str] = None
     created_at: datetime
     source_id: int
     source_name: str
@@ -74,6 +113,7 @@ class SourceInfo(BaseModel):
     id: int
     name: str
     url: str
+    max_response_bytes: Optional[int] = None
 
 class SourcesListResponse(BaseModel):
     total_sources: int
@@ -85,6 +125,12 @@ class TaskRequest(BaseModel):
     scheduled_time: datetime
     task_name: Optional[str] = None  # Optional custom task name
 
+class SitemapDiscoveryRequest(BaseModel):
+    sitemap_url: Optional[HttpUrl] = None   # defaults to <source origin>/sitemap.xml
+    url_pattern: Optional[str] = None       # regex the page URLs must match
+    max_urls: Optional[int] = None
+    full: bool = False                      # ignore lastmod and consider every URL
+
 class TaskInfo(BaseModel):
     id: int
     task_name: str
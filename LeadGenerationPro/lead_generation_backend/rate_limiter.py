@@ -0,0 +1,51 @@
+import os
+import time
+import asyncio
+import threading
+from typing import Dict
+
+DEFAULT_HOST_INTERVAL = float(os.getenv("HOST_MIN_INTERVAL", "0"))   # seconds between requests to one host
+MAX_HOST_INTERVAL = float(os.getenv("MAX_CRAWL_DELAY", "30"))         # cap for robots.txt crawl-delay
+
+
+class HostRateLimiter:
+    """
+    Spaces requests to the same host at least `interval` seconds apart.
+
+    Slots are reserved under a thread lock, so the limiter is shared by the uvicorn loop
+    and the per-request loops of dynamic scrapes; the waiting itself is an asyncio sleep.
+    """
+
+    def __init__(self, default_interval: float = DEFAULT_HOST_INTERVAL, max_interval: float = MAX_HOST_INTERVAL):
+        self.default_interval = default_interval
+        self.max_interval = max_interval
+        self._intervals: Dict[str, float] = {}
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def set_interval(self, host: str, interval: float):
+        """Set a host's spacing, e.g. from robots.txt crawl-delay (never below the default)."""
+        with self._lock:
+            self._intervals[host] = min(max(interval, self.default_interval), self.max_interval)
+
+    def interval(self, host: str) -> float:
+        return self._intervals.get(host, self.default_interval)
+
+    def reserve(self, host: str) -> float:
+        """Reserve the host's next request slot and return how long to wait for it."""
+        with self._lock:
+            interval = self._intervals.get(host, self.default_interval)
+            if interval <= 0:
+                return 0.0
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+            return slot - now
+
+    async def wait(self, host: str):
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+rate_limiter = HostRateLimiter()
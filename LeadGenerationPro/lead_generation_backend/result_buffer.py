@@ -0,0 +1,187 @@
+import io
+import itertools
+from collections.abc import MutableMapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Rows of COPY text produced per read-ahead chunk
+COPY_CHUNK_ROWS = 1000
+
+
+class RowView(MutableMapping):
+    """
+    A dict-like window onto one row of a ColumnarRows buffer. Nothing is copied: reads and
+    writes go straight to the columns, so code written for row dicts (detail crawling,
+    persistence) works unchanged.
+    """
+
+    __slots__ = ("_buffer", "_index")
+
+    def __init__(self, buffer: "ColumnarRows", index: int):
+        self._buffer = buffer
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        column = self._buffer._columns.get(key)
+        value = column[self._index] if column is not None else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self._buffer.add_column(key)[self._index] = value
+
+    def __delitem__(self, key: str):
+        self[key]   # KeyError when absent, like a dict
+        self._buffer._columns[key][self._index] = None
+
+    def __iter__(self) -> Iterator[str]:
+        for name, column in self._buffer._columns.items():
+            if column[self._index] is not None:
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ColumnarRows(Sequence):
+    """
+    Scraped rows stored column by column: one list per field instead of one dict per row.
+
+    A missing value is None in its column (a row that never had the key), so a column is
+    both the values and their null mask. Indexing returns a lazy RowView; the buffer converts
+    to row dicts (for responses and the result cache) or streams straight into PostgreSQL COPY,
+    so task runs persist without ever building one dict per row.
+    """
+
+    def __init__(self, columns: Iterable[str] = ()):
+        self._columns: Dict[str, List[Any]] = {name: [] for name in columns}
+        self._length = 0
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> List[Any]:
+        return self._columns[name]
+
+    def add_column(self, name: str) -> List[Any]:
+        """The column for `name`, created (all missing) for rows that predate it."""
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = [None] * self._length
+        return column
+
+    def append_values(self, values: List[Any]):
+        """
+        Append a row given as values in column_names order - the allocation-free fast path.
+        Columns past the end of `values` (e.g. added by add_column since) get None.
+        """
+        if len(values) > len(self._columns):
+            raise ValueError(f"{len(values)} values for {len(self._columns)} columns")
+        for column, value in itertools.zip_longest(self._columns.values(), values):
+            column.append(value)
+        self._length += 1
+
+    def append(self, row: Dict[str, Any]):
+        for name in row:
+            self.add_column(name)
+        for name, column in self._columns.items():
+            column.append(row.get(name))
+        self._length += 1
+
+    def take(self, indices: Iterable[int]) -> "ColumnarRows":
+        """A new buffer holding only the rows at `indices`, in that order."""
+        indices = list(indices)
+        taken = ColumnarRows()
+        taken._columns = {name: [column[i] for i in indices] for name, column in self._columns.items()}
+        taken._length = len(indices)
+        return taken
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RowView(self, i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("row index out of range")
+        return RowView(self, index)
+
+    def __iter__(self) -> Iterator[RowView]:
+        for i in range(self._length):
+            yield RowView(self, i)
+
+    # -- conversions -------------------------------------------------------------------
+
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        names = list(self._columns)
+        for values in zip(*self._columns.values()):
+            yield {name: value for name, value in zip(names, values) if value is not None}
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return list(self.iter_dicts())
+
+    def copy_stream(self, columns: List[str], rows_per_chunk: int = COPY_CHUNK_ROWS) -> "CopyStream":
+        """
+        The given columns in PostgreSQL COPY text format, as a file psycopg2 reads from while
+        the text is produced a chunk of rows at a time. Missing values and empty strings
+        become NULL, so non-text columns accept them (as persist_rows always did).
+        """
+        data = [self._columns.get(name) or [None] * self._length for name in columns]
+        return CopyStream(_copy_chunks(zip(*data), rows_per_chunk))
+
+
+class CopyStream(io.TextIOBase):
+    """Read-only text file over an iterator of chunks, so COPY input is never held in full."""
+
+    def __init__(self, chunks: Iterator[str]):
+        self._chunks = chunks
+        self._pending = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> str:
+        if size is None or size < 0:
+            data, self._pending = self._pending + "".join(self._chunks), ""
+            return data
+        while len(self._pending) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._pending += chunk
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def _copy_chunks(rows: Iterator[tuple], rows_per_chunk: int) -> Iterator[str]:
+    chunk = []
+    for values in rows:
+        chunk.append("\t".join(_copy_text(value) for value in values) + "\n")
+        if len(chunk) >= rows_per_chunk:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def _copy_text(value: Any) -> str:
+    if value is None or value == "":
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def as_columnar(rows) -> ColumnarRows:
+    """The rows as a ColumnarRows buffer, converting a list of row dicts if needed."""
+    if isinstance(rows, ColumnarRows):
+        return rows
+    buffer = ColumnarRows()
+    for row in rows:
+        buffer.append(row)
+    return buffer
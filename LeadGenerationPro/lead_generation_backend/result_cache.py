@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+from models import ScrapeRequest, ScrapeResponse
+from data_dir import data_path
+
+logger = logging.getLogger(__name__)
+
+# Fields that change how a request is served, not what it extracts
+UNCACHED_FIELDS = {"bypass_cache", "max_age", "timeout"}
+
+
+class ResultCache:
+    """
+    Cache of extracted ScrapeResponses keyed by URL + canonicalized mapping.
+
+    Entries live in an in-memory LRU and, when a directory is configured, in an
+    on-disk tier that survives restarts and is shared by workers on the same host.
+    """
+
+    def __init__(self, ttl: int = 300, max_entries: int = 256, disk_dir: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(request: ScrapeRequest, mode: str) -> str:
+        canonical = request.model_dump(mode="json", exclude=UNCACHED_FIELDS)
+        payload = json.dumps({"mode": mode, "request": canonical}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key: str, max_age: Optional[int] = None) -> Optional[ScrapeResponse]:
+        """Return the cached response if it is younger than max_age; the cache TTL always applies."""
+        limit = self.ttl if max_age is None else min(self.ttl, max_age)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, response = entry
+                if now - stored_at <= limit:
+                    self._memory.move_to_end(key)
+                    return response
+                if now - stored_at > self.ttl:
+                    del self._memory[key]
+
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - entry["stored_at"] > limit:
+            return None
+        response = ScrapeResponse.model_validate(entry["response"])
+        self._remember(key, entry["stored_at"], response)
+        return response
+
+    def put(self, key: str, response: ScrapeResponse):
+        stored_at = time.time()
+        self._remember(key, stored_at, response)
+        if not self.disk_dir:
+            return
+        tmp_path = f"{self._disk_path(key)}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": stored_at, "response": response.model_dump(mode="json")}, f)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            logger.warning(f"Could not write result cache entry: {e}")
+
+    def _remember(self, key: str, stored_at: float, response: ScrapeResponse):
+        with self._lock:
+            self._memory[key] = (stored_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+result_cache = ResultCache(
+    ttl=int(os.getenv("RESULT_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("RESULT_CACHE_SIZE", "256")),
+    disk_dir=data_path(os.getenv("RESULT_CACHE_DIR")) if os.getenv("RESULT_CACHE_DIR") else None
+)
@@ -0,0 +1,168 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+import aiohttp
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    """A transient failure (5xx, 429, dropped connection) worth another attempt."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """The host failed repeatedly and is being skipped until its cool-down ends."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 10.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Exponential backoff with full jitter; a server's Retry-After wins when larger."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            return min(self.max_delay, max(backoff, retry_after))
+        return backoff
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker: after `failure_threshold` consecutive failures the host is skipped
+    for `reset_timeout` seconds, then a single trial request decides whether it closes again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trial_running: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, host: str) -> bool:
+        """Raise CircuitOpenError while the host is skipped; True when this request is the half-open trial."""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return False
+            if time.monotonic() - opened_at < self.reset_timeout or self._trial_running.get(host):
+                raise CircuitOpenError(f"Host {host} is failing; skipping requests for now")
+            # Half-open: let one trial request through
+            self._trial_running[host] = True
+            return True
+
+    def release_trial(self, host: str):
+        """End a trial that neither succeeded nor failed (cancelled), so another one can run."""
+        with self._lock:
+            self._trial_running.pop(host, None)
+
+    def record_success(self, host: str):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._trial_running.pop(host, None)
+
+    def record_failure(self, host: str):
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold or self._trial_running.get(host):
+                if host not in self._opened_at or self._trial_running.get(host):
+                    logger.warning(f"Circuit opened for {host} after {failures} failures")
+                self._opened_at[host] = time.monotonic()
+                self._trial_running.pop(host, None)
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            if host not in self._opened_at:
+                return "closed"
+            if self._trial_running.get(host) or time.monotonic() - self._opened_at[host] >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+
+retry_policy = RetryPolicy(
+    attempts=int(os.getenv("FETCH_RETRY_ATTEMPTS", "3")),
+    base_delay=float(os.getenv("FETCH_RETRY_BASE_DELAY", "0.5")),
+    max_delay=float(os.getenv("FETCH_RETRY_MAX_DELAY", "10"))
+)
+circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+)
+
+
+def is_transient(error: Exception) -> bool:
+    return isinstance(error, (RetryableError, asyncio.TimeoutError, aiohttp.ClientConnectionError,
+                              aiohttp.ClientPayloadError, httpx.TransportError))
+
+
+def is_http_response_error(error: Exception) -> bool:
+    """A status error for a response the host actually sent (e.g. a 404)."""
+    return isinstance(error, (aiohttp.ClientResponseError, httpx.HTTPStatusError))
+
+
+async def call_with_retries(url: str, operation: Callable[[], Awaitable[T]],
+                            policy: RetryPolicy = retry_policy,
+                            breaker: CircuitBreaker = circuit_breaker) -> T:
+    """
+    Run `operation` for a URL, retrying transient failures with backoff and jitter.
+    Every attempt goes through the host's circuit breaker; non-transient errors are raised at once.
+    """
+    host = urlsplit(str(url)).netloc
+    for attempt in range(policy.attempts):
+        trial = breaker.before_request(host)
+        try:
+            result = await operation()
+        except Exception as e:
+            if not is_transient(e):
+                if is_http_response_error(e):
+                    breaker.record_success(host)   # e.g. a 404: the host is up, the request was wrong
+                # Anything else (robots.txt block, size cap, bad input) never reached the host:
+                # the breaker state stays as it was and a trial is just released below
+                raise
+            breaker.record_failure(host)
+            if attempt + 1 >= policy.attempts or breaker.state(host) == "open":
+                raise
+            delay = policy.delay(attempt, getattr(e, "retry_after", None))
+            logger.info(f"Retrying {url} in {delay:.2f}s after: {e or type(e).__name__}")
+        else:
+            breaker.record_success(host)
+            return result
+        finally:
+            if trial:
+                # Cancelled (CancelledError is a BaseException): don't leave the host blocked for good
+                breaker.release_trial(host)
+        await asyncio.sleep(delay)
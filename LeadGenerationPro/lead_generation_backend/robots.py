@@ -0,0 +1,149 @@
+import os
+import re
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import aiohttp
+from rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+RESPECT_ROBOTS = os.getenv("RESPECT_ROBOTS", "true").lower() in ("1", "true", "yes")
+ROBOTS_USER_AGENT = os.getenv("ROBOTS_USER_AGENT", "LeadGenerationPro").lower()
+ROBOTS_TTL = int(os.getenv("ROBOTS_TTL", "3600"))
+ROBOTS_ERROR_TTL = int(os.getenv("ROBOTS_ERROR_TTL", "300"))
+
+
+class RobotsRules:
+    """Allow/disallow rules of one robots.txt group, compiled for fast per-URL checks."""
+
+    def __init__(self, rules: List[Tuple[bool, str]] = None, crawl_delay: Optional[float] = None,
+                 disallow_all: bool = False):
+        self.crawl_delay = crawl_delay
+        self.disallow_all = disallow_all
+        # Longest pattern wins; on equal length allow wins (RFC 9309)
+        ordered = sorted(rules or [], key=lambda r: (len(r[1]), r[0]), reverse=True)
+        self._rules = [(allow, self._compile(pattern)) for allow, pattern in ordered]
+
+    @staticmethod
+    def _compile(pattern: str):
+        anchored = pattern.endswith("$")
+        if anchored:
+            pattern = pattern[:-1]
+        regex = ".*".join(re.escape(part) for part in pattern.split("*"))
+        return re.compile(regex + ("$" if anchored else ""))
+
+    def allowed(self, path: str) -> bool:
+        if self.disallow_all:
+            return False
+        for allow, regex in self._rules:
+            if regex.match(path):
+                return allow
+        return True
+
+
+def parse_robots(text: str, user_agent: str = ROBOTS_USER_AGENT) -> RobotsRules:
+    """Pick the group for our user agent (or '*') from a robots.txt body."""
+    groups: Dict[str, dict] = {}
+    current_agents: List[str] = []
+    in_rules = False
+
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        field, value = (part.strip() for part in line.split(":", 1))
+        field = field.lower()
+
+        if field == "user-agent":
+            if in_rules:
+                current_agents = []
+                in_rules = False
+            agent = value.lower()
+            current_agents.append(agent)
+            groups.setdefault(agent, {"rules": [], "crawl_delay": None})
+        elif field in ("allow", "disallow") and current_agents:
+            in_rules = True
+            if value:
+                for agent in current_agents:
+                    groups[agent]["rules"].append((field == "allow", value))
+        elif field == "crawl-delay" and current_agents:
+            in_rules = True
+            try:
+                for agent in current_agents:
+                    groups[agent]["crawl_delay"] = float(value)
+            except ValueError:
+                pass
+
+    group = next((g for agent, g in groups.items() if agent != "*" and agent in user_agent), None)
+    group = group or groups.get("*")
+    if not group:
+        return RobotsRules()
+    return RobotsRules(group["rules"], group["crawl_delay"])
+
+
+class RobotsCache:
+    """robots.txt per host with a TTL, shared by every fetcher in the process."""
+
+    def __init__(self, ttl: int = ROBOTS_TTL, error_ttl: int = ROBOTS_ERROR_TTL):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self._entries: Dict[str, Tuple[float, RobotsRules]] = {}
+        self._lock = threading.Lock()
+
+    def cached(self, origin: str) -> Optional[RobotsRules]:
+        with self._lock:
+            entry = self._entries.get(origin)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def store(self, origin: str, rules: RobotsRules, ttl: int):
+        with self._lock:
+            self._entries[origin] = (time.monotonic() + ttl, rules)
+        if rules.crawl_delay:
+            rate_limiter.set_interval(urlsplit(origin).netloc, rules.crawl_delay)
+
+    async def rules_for(self, url: str, session: aiohttp.ClientSession) -> RobotsRules:
+        parts = urlsplit(str(url))
+        origin = f"{parts.scheme}://{parts.netloc}"
+        rules = self.cached(origin)
+        if rules is not None:
+            return rules
+
+        try:
+            async with session.get(f"{origin}/robots.txt", timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status >= 500:
+                    # Server trouble: assume full disallow for a short while
+                    rules, ttl = RobotsRules(disallow_all=True), self.error_ttl
+                elif response.status >= 400:
+                    rules, ttl = RobotsRules(), self.ttl
+                else:
+                    rules, ttl = parse_robots(await response.text(errors="replace")), self.ttl
+        except Exception as e:
+            logger.warning(f"Could not fetch robots.txt for {origin}: {e}")
+            rules, ttl = RobotsRules(), self.error_ttl
+
+        self.store(origin, rules, ttl)
+        return rules
+
+    async def allowed(self, url: str, session: aiohttp.ClientSession) -> bool:
+        if not RESPECT_ROBOTS:
+            return True
+        parts = urlsplit(str(url))
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        rules = await self.rules_for(url, session)
+        return rules.allowed(path)
+
+
+robots_cache = RobotsCache()
+
+
+async def polite_wait(url: str, session: aiohttp.ClientSession):
+    """Check robots.txt for the URL and wait for the host's rate-limit slot.
+    Raises PermissionError when robots.txt disallows the URL."""
+    if not await robots_cache.allowed(url, session):
+        raise PermissionError(f"Blocked by robots.txt: {url}")
+    await rate_limiter.wait(urlsplit(str(url)).netloc)
@@ -0,0 +1,181 @@
+import os
+import select
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel the DDL endpoints of every worker announce changed tables on
+SCHEMA_CHANNEL = os.getenv("SCHEMA_CHANNEL", "schema_changed")
+# How long the listener waits for notifications before checking whether it should stop
+SCHEMA_LISTEN_INTERVAL = float(os.getenv("SCHEMA_LISTEN_INTERVAL", "5"))
+
+# Every column of every public table in one round trip. format_type() names types as
+# information_schema.columns.data_type does (integer, text, timestamp without time zone, ...).
+# A column counts as indexed only when it leads a full btree index: the only kind that
+# serves ORDER BY for every row (GIN/hash can't, a partial index lacks rows).
+_CATALOG_QUERY = """
+    SELECT c.relname,
+           a.attname,
+           format_type(a.atttypid, NULL),
+           CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END,
+           EXISTS (SELECT 1 FROM pg_index i
+                   JOIN pg_class ic ON ic.oid = i.indexrelid
+                   JOIN pg_am am ON am.oid = ic.relam
+                   WHERE i.indrelid = c.oid AND i.indkey[0] = a.attnum
+                   AND am.amname = 'btree' AND i.indpred IS NULL)
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+"""
+
+
+@dataclass
+class TableSchema:
+    name: str
+    columns: List[Tuple[str, str, str]] = field(default_factory=list)   # (name, data type, nullable)
+    indexed: Set[str] = field(default_factory=set)                      # columns leading a btree index
+
+    @property
+    def column_names(self) -> List[str]:
+        return [c[0] for c in self.columns]
+
+    @property
+    def column_types(self) -> List[Tuple[str, str]]:
+        return [(c[0], c[1]) for c in self.columns]
+
+    def has_column(self, name: str) -> bool:
+        return any(c[0] == name for c in self.columns)
+
+
+class SchemaCatalog:
+    """
+    In-process cache of the public schema's tables, columns and indexes.
+
+    The whole catalog is loaded with one pg_catalog query. DDL endpoints invalidate just
+    the tables they changed and announce them with NOTIFY, so other workers' listeners
+    drop the same entries; only stale tables are re-read, on their next lookup.
+    """
+
+    def __init__(self, channel: str = SCHEMA_CHANNEL):
+        self.channel = channel
+        self._tables: Optional[Dict[str, TableSchema]] = None
+        self._stale: Set[str] = set()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _read(self, cur, names: Optional[List[str]] = None) -> Dict[str, TableSchema]:
+        query, params = _CATALOG_QUERY, ()
+        if names is not None:
+            query += " AND c.relname = ANY(%s)"
+            params = (names,)
+        cur.execute(query + " ORDER BY c.relname, a.attnum", params)
+        tables: Dict[str, TableSchema] = {}
+        for table, column, data_type, nullable, indexed in cur.fetchall():
+            schema = tables.setdefault(table, TableSchema(table))
+            schema.columns.append((column, data_type, nullable))
+            if indexed:
+                schema.indexed.add(column)
+        return tables
+
+    def _refresh(self, cur, missing: Optional[str] = None) -> Dict[str, TableSchema]:
+        """Load the catalog if needed and re-read stale tables (and `missing`, if given)."""
+        with self._lock:
+            tables, stale, generation = self._tables, set(self._stale), self._generation
+        if tables is not None and not stale and missing is None:
+            return tables
+
+        if tables is None:
+            loaded, names = self._read(cur), None
+        else:
+            names = sorted(stale | ({missing} if missing else set()))
+            loaded = self._read(cur, names)
+
+        with self._lock:
+            if self._generation != generation:
+                # Invalidated while we were reading: serve what we read, keep the entries stale
+                return {**(self._tables or {}), **loaded}
+            if names is None:
+                self._tables = loaded
+            else:
+                self._tables = {k: v for k, v in self._tables.items() if k not in names}
+                self._tables.update(loaded)
+            self._stale.clear()
+            return self._tables
+
+    def tables(self, cur) -> Dict[str, TableSchema]:
+        return self._refresh(cur)
+
+    def table(self, cur, name: str) -> Optional[TableSchema]:
+        """Schema of one table, or None. A miss is re-checked once, for tables created out of band."""
+        schema = self._refresh(cur).get(name)
+        if schema is None:
+            schema = self._refresh(cur, missing=name).get(name)
+        return schema
+
+    def invalidate(self, *names: str):
+        """Mark tables stale in this process; without names the whole catalog is reloaded."""
+        with self._lock:
+            self._generation += 1
+            if not names:
+                self._tables = None
+                self._stale.clear()
+            elif self._tables is not None:
+                self._stale.update(names)
+
+    def notify(self, cur, *names: str):
+        """
+        Announce changed tables to every worker. Run it in the DDL's own transaction, and
+        invalidate() locally after the commit: NOTIFY is only delivered on commit, so no worker
+        re-reads a table before its change is visible.
+        """
+        for name in names:
+            cur.execute("SELECT pg_notify(%s, %s)", (self.channel, name))
+
+    # -- cross-worker invalidation ---------------------------------------------------------
+
+    def start_listener(self, connect: Callable):
+        if self._listener is not None and self._listener.is_alive():
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, args=(connect,), name="schema-listener", daemon=True)
+        self._listener.start()
+
+    def stop_listener(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=SCHEMA_LISTEN_INTERVAL + 1)
+            self._listener = None
+
+    def _listen(self, connect: Callable):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = connect()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}"')
+                # Changes made while we were not listening were missed
+                self.invalidate()
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], SCHEMA_LISTEN_INTERVAL) == ([], [], []):
+                        continue
+                    conn.poll()
+                    names = {n.payload for n in conn.notifies}
+                    conn.notifies.clear()
+                    if names:
+                        self.invalidate(*names)
+            except Exception as e:
+                logger.warning(f"Schema listener disconnected, retrying: {e}")
+                self._stop.wait(SCHEMA_LISTEN_INTERVAL)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+schema_catalog = SchemaCatalog()
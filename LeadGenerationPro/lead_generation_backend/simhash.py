@@ -0,0 +1,67 @@
+import re
+import hashlib
+from collections import Counter
+from typing import List, Optional
+
+BITS = 64
+BANDS = 4   # a match within distance < BANDS shares at least one exact 16-bit band
+BAND_BITS = BITS // BANDS
+
+# Page chrome that differs between mirrors while the listing itself is the same.
+# <form> stays: ASP.NET pages wrap the whole body in one.
+_BOILERPLATE = re.compile(
+    r'<(script|style|noscript|nav|header|footer|aside|svg)\b[^>]*>.*?</\1\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+_TAG = re.compile(r'<[^>]+>')
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def main_text(html: str) -> str:
+    """Visible text of the page without navigation, scripts and other boilerplate."""
+    return _TAG.sub(' ', _BOILERPLATE.sub(' ', html))
+
+
+def simhash(text: str, shingle_size: int = 3, min_shingles: int = 1) -> Optional[int]:
+    """
+    64-bit SimHash of the text's word shingles (unsigned), or None when the text has fewer
+    than `min_shingles` distinct shingles: near-empty pages (JS shells) would all hash alike.
+    """
+    words = [w.lower() for w in _WORD.findall(text)]
+    if len(words) < shingle_size:
+        shingles = Counter([' '.join(words)]) if words else Counter()
+    else:
+        shingles = Counter(' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1))
+    if not shingles or len(shingles) < min_shingles:
+        return None
+
+    weights = [0] * BITS
+    for shingle, count in shingles.items():
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+
+    value = 0
+    for bit in range(BITS):
+        if weights[bit] > 0:
+            value |= 1 << bit
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << BITS) - 1)).count('1')
+
+
+def bands(value: int) -> List[int]:
+    """Split a hash into BANDS exact-match keys used to look up candidate near-duplicates."""
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (i * BAND_BITS)) & mask for i in range(BANDS)]
+
+
+def to_signed(value: int) -> int:
+    """Unsigned 64-bit hash -> PostgreSQL BIGINT."""
+    return value - (1 << BITS) if value >= 1 << (BITS - 1) else value
+
+
+def from_signed(value: int) -> int:
+    return value + (1 << BITS) if value < 0 else value
@@ -0,0 +1,137 @@
+import re
+import zlib
+import logging
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+from xml.etree.ElementTree import XMLPullParser
+import aiohttp
+from utils import get_http_session
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class SitemapError(Exception):
+    """The root sitemap could not be downloaded or parsed."""
+
+
+def _local(tag: str) -> str:
+    """Tag name without its XML namespace."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """Parse a W3C datetime (YYYY, YYYY-MM-DD or full timestamp) into an aware UTC datetime."""
+    if not value:
+        return None
+    value = value.strip().replace("Z", "+00:00")
+    for fmt in ("%Y-%m-%dT%H:%M:%S.%f%z", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M%z", "%Y-%m-%d", "%Y-%m", "%Y"):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
+    return None
+
+
+def _changed_since(lastmod: Optional[datetime], since: Optional[datetime]) -> bool:
+    # Entries without lastmod can't be ruled out
+    return since is None or lastmod is None or lastmod > since
+
+
+async def _stream_entries(sitemap_url: str, timeout: int) -> AsyncIterator[Tuple[str, str, Optional[datetime]]]:
+    """
+    Yield (kind, loc, lastmod) for each <url> or <sitemap> entry while the file downloads.
+    Gzipped sitemaps are inflated chunk by chunk; parsed elements are discarded as we go.
+    """
+    session = get_http_session()
+    parser = XMLPullParser(events=("start", "end"))
+    state = {"root": None}
+    inflater = None
+
+    async with session.get(sitemap_url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        response.raise_for_status()
+        first = True
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            if first:
+                # Gzip magic bytes - servers often send .xml.gz without Content-Encoding
+                if chunk[:2] == b"\x1f\x8b":
+                    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                first = False
+            parser.feed(inflater.decompress(chunk) if inflater else chunk)
+            for entry in _drain(parser, state):
+                yield entry
+        if inflater:
+            parser.feed(inflater.flush())
+    parser.close()
+    for entry in _drain(parser, state):
+        yield entry
+
+
+def _drain(parser: XMLPullParser, state: dict):
+    for event, element in parser.read_events():
+        if event == "start":
+            if state["root"] is None:
+                state["root"] = element
+            continue
+        kind = _local(element.tag)
+        if kind not in ("url", "sitemap"):
+            continue
+        loc = lastmod = None
+        for child in element:
+            name = _local(child.tag)
+            if name == "loc":
+                loc = (child.text or "").strip()
+            elif name == "lastmod":
+                lastmod = parse_lastmod(child.text)
+        # Drop finished entries from the tree so memory stays flat on huge sitemaps
+        state["root"].clear()
+        if loc:
+            yield kind, loc, lastmod
+
+
+async def discover_sitemap_urls(sitemap_url: str, since: Optional[datetime] = None,
+                                url_pattern: Optional[str] = None, max_urls: Optional[int] = None,
+                                timeout: int = 60, max_depth: int = 3,
+                                failed_sitemaps: Optional[List[str]] = None) -> AsyncIterator[Tuple[str, Optional[datetime]]]:
+    """
+    Yield (url, lastmod) for pages in a sitemap or sitemap index that match `url_pattern`
+    (a regex) and changed after `since`. Child sitemaps older than `since` are not downloaded.
+    Raises SitemapError when the root sitemap fails; a failing child sitemap is skipped and
+    its URL appended to `failed_sitemaps`.
+    """
+    if since is not None and since.tzinfo is None:
+        since = since.astimezone(timezone.utc)  # naive values are local time, like task_runs timestamps
+    pattern = re.compile(url_pattern) if url_pattern else None
+    pending = [(sitemap_url, 0)]
+    visited = set()
+    found = 0
+
+    while pending:
+        current, depth = pending.pop(0)
+        if current in visited:
+            continue
+        visited.add(current)
+        try:
+            async for kind, loc, lastmod in _stream_entries(current, timeout):
+                if not _changed_since(lastmod, since):
+                    continue
+                if kind == "sitemap":
+                    if depth < max_depth:
+                        pending.append((loc, depth + 1))
+                    continue
+                if pattern and not pattern.search(loc):
+                    continue
+                yield loc, lastmod
+                found += 1
+                if max_urls and found >= max_urls:
+                    return
+        except Exception as e:
+            if current == sitemap_url:
+                raise SitemapError(f"Failed to read sitemap {current}: {e}") from e
+            logger.warning(f"Failed to read sitemap {current}: {e}")
+            if failed_sitemaps is not None:
+                failed_sitemaps.append(current)
@@ -0,0 +1,115 @@
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional
+from bs4 import BeautifulSoup, SoupStrainer
+from utils import extract_row, is_structured_field
+
+logger = logging.getLogger(__name__)
+
+# Finds the JSON-LD blocks with a regex, so the rest of the page is never parsed into a DOM
+_JSON_LD = re.compile(
+    r'<script[^>]*type\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def _flatten(node: Any, items: List[dict]):
+    """Collect every typed object, unwrapping lists and @graph containers."""
+    if isinstance(node, list):
+        for child in node:
+            _flatten(child, items)
+    elif isinstance(node, dict):
+        if "@type" in node:
+            items.append(node)
+        if "@graph" in node:
+            _flatten(node["@graph"], items)
+
+
+def extract_json_ld(html: str) -> List[dict]:
+    """Return the schema.org objects embedded as JSON-LD in the page."""
+    items = []
+    for block in _JSON_LD.findall(html):
+        block = block.strip()
+        if block.startswith("<!--"):
+            block = block[4:].rsplit("-->", 1)[0]
+        try:
+            _flatten(json.loads(block), items)
+        except ValueError as e:
+            logger.warning(f"Skipping invalid JSON-LD block: {e}")
+    return items
+
+
+def _microdata_value(element) -> Any:
+    if element.has_attr("itemscope"):
+        return _microdata_item(element)
+    for attr in ("content", "href", "src", "datetime", "value"):
+        if element.has_attr(attr):
+            return element[attr]
+    return re.sub(r"\s+", " ", element.get_text()).strip()
+
+
+def _microdata_item(scope) -> dict:
+    item = {}
+    itemtype = scope.get("itemtype", "")
+    if itemtype:
+        item["@type"] = itemtype.rstrip("/").rsplit("/", 1)[-1]
+
+    # Properties of this item only - nested itemscopes own their own properties
+    stack = list(scope.find_all(True, recursive=False))
+    while stack:
+        element = stack.pop(0)
+        if element.has_attr("itemprop"):
+            value = _microdata_value(element)
+            for prop in element["itemprop"].split():
+                item.setdefault(prop, value)
+        if not element.has_attr("itemscope"):
+            stack[0:0] = element.find_all(True, recursive=False)
+    return item
+
+
+def extract_microdata(html: str) -> List[dict]:
+    """Return the top-level schema.org microdata items, building only the itemscope subtrees."""
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer(attrs={"itemscope": True}))
+    items = []
+    for scope in soup.find_all(attrs={"itemscope": True}):
+        if scope.find_parent(attrs={"itemscope": True}) is None:
+            items.append(_microdata_item(scope))
+    return items
+
+
+def _type_matches(item: dict, structured_type: Optional[str]) -> bool:
+    if not structured_type:
+        return True
+    types = item.get("@type")
+    types = types if isinstance(types, list) else [types]
+    return any(str(t).rsplit("/", 1)[-1].lower() == structured_type.lower() for t in types)
+
+
+def structured_items(html: str, structured_type: Optional[str] = None) -> List[dict]:
+    """JSON-LD items of the given @type, falling back to microdata when the page has no JSON-LD."""
+    items = [item for item in extract_json_ld(html) if _type_matches(item, structured_type)]
+    if not items and "itemscope" in html:
+        items = [item for item in extract_microdata(html) if _type_matches(item, structured_type)]
+    return items
+
+
+def is_structured_mapping(field_mappings) -> bool:
+    """True when every field reads from structured data, so the page DOM is never needed."""
+    return bool(field_mappings) and all(is_structured_field(m) for m in field_mappings.values())
+
+
+def structured_rows(html: str, field_mappings, structured_type: Optional[str] = None,
+                    max_items: int = None) -> List[Dict[str, Any]]:
+    """Build one row per schema.org item using the fields' JSONPath selectors."""
+    items = structured_items(html, structured_type)
+    if max_items:
+        items = items[:max_items]
+
+    rows = []
+    for i, item in enumerate(items, 1):
+        row = {"index": i}
+        row.update(extract_row(None, field_mappings, item))
+        if any(v for k, v in row.items() if k != "index" and v):
+            rows.append(row)
+    return rows
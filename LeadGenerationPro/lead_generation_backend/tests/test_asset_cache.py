@@ -0,0 +1,13 @@
+from asset_cache import freshness
+
+
+def test_no_cache_wins_over_max_age():
+    assert freshness({"cache-control": "no-cache, max-age=600"}, 3600) == 0
+    assert freshness({"cache-control": "max-age=600, no-cache"}, 3600) == 0
+
+
+def test_max_age_and_validators():
+    assert freshness({"cache-control": "public, max-age=600"}, 3600) == 600
+    assert freshness({"cache-control": "private, max-age=600"}, 3600) == 0
+    assert freshness({"etag": '"abc"'}, 3600) == 3600
+    assert freshness({}, 3600) == 0
@@ -0,0 +1,18 @@
+import codecs
+from charset import decode_body, declared_encoding
+
+
+def test_bom_wins_over_a_wrong_header_charset():
+    body = codecs.BOM_UTF8 + "héllo".encode("utf-8")
+    assert declared_encoding(body, "text/html; charset=iso-8859-1") == "utf-8-sig"
+    assert decode_body(body, "text/html; charset=iso-8859-1") == "héllo"
+
+
+def test_header_charset_wins_over_meta():
+    body = '<meta charset="utf-8"><p>café</p>'.encode("cp1252")
+    assert decode_body(body, "text/html; charset=windows-1252") == '<meta charset="utf-8"><p>café</p>'
+
+
+def test_undeclared_pages_decode_as_utf8():
+    assert declared_encoding("<p>naïve</p>".encode("utf-8")) is None
+    assert decode_body("<p>naïve</p>".encode("utf-8")) == "<p>naïve</p>"
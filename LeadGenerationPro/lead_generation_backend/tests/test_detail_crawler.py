@@ -0,0 +1,55 @@
+import asyncio
+from bs4 import BeautifulSoup
+import detail_crawler
+from detail_crawler import crawl_details
+from models import DetailMapping, FieldMapping
+from result_buffer import ColumnarRows
+
+DETAIL = DetailMapping(
+    link_field="company_link",
+    field_mappings={"email": FieldMapping(selector=".email")},
+)
+
+
+def _listing():
+    rows = ColumnarRows(["company_name", "company_link"])
+    rows.append_values(["Acme", "/companies/acme"])
+    rows.append_values(["Globex", "/companies/globex"])
+    rows.append_values(["Initech", None])
+    return rows
+
+
+def test_rows_crawled_by_an_earlier_run_are_dropped(monkeypatch):
+    fetched = []
+
+    async def fake_fetch_page(url, timeout=15):
+        fetched.append(url)
+        return BeautifulSoup("<p class='email'>sales@globex.com</p>", "html.parser")
+
+    monkeypatch.setattr(detail_crawler, "fetch_page", fake_fetch_page)
+    seen_urls = {"https://example.com/companies/acme"}
+    sunk = []
+
+    rows = asyncio.run(crawl_details(_listing(), DETAIL, "https://example.com/search",
+                                     seen_urls=seen_urls, sink=sunk.extend))
+
+    # Acme was persisted with its email by the run that crawled it - not again with a blank one
+    assert fetched == ["https://example.com/companies/globex"]
+    assert isinstance(rows, ColumnarRows)
+    assert [row["company_name"] for row in rows] == ["Globex", "Initech"]
+    assert rows[0]["email"] == "sales@globex.com"
+    assert sorted(row["company_name"] for row in sunk) == ["Globex", "Initech"]
+    assert "https://example.com/companies/globex" in seen_urls
+
+
+def test_seen_rows_are_kept_without_skip_seen(monkeypatch):
+    async def fake_fetch_page(url, timeout=15):
+        return BeautifulSoup("<p class='email'>info@example.com</p>", "html.parser")
+
+    monkeypatch.setattr(detail_crawler, "fetch_page", fake_fetch_page)
+    detail = DETAIL.model_copy(update={"skip_seen": False})
+    rows = asyncio.run(crawl_details(_listing(), detail, "https://example.com/search",
+                                     seen_urls={"https://example.com/companies/acme"}))
+
+    assert len(rows) == 3
+    assert rows[0]["email"] == "info@example.com"
@@ -0,0 +1,53 @@
+import io
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from entity_export import csv_chunks, ndjson_chunks, parquet_chunks
+
+COLUMNS = [
+    ("id", "integer"),
+    ("name", "text"),
+    ("price", "numeric"),
+    ("scraped_at", "timestamp without time zone"),
+    ("details", "jsonb"),
+    ("tags", "text[]"),
+]
+
+
+def test_parquet_round_trip():
+    pq = pytest.importorskip("pyarrow.parquet")
+    # Rows as psycopg2 returns them: json(b) and arrays already decoded to Python objects
+    batches = iter([
+        [(1, "Acme", Decimal("9.50"), datetime(2024, 5, 1, 12, 30), {"phone": None, "open": True}, ["b2b", "saas"])],
+        [(2, None, None, None, None, None),
+         (3, "Globex", Decimal("12"), datetime(2024, 5, 2), [1, "two"], [])],
+    ])
+    table = pq.read_table(io.BytesIO(b"".join(parquet_chunks(COLUMNS, batches))))
+
+    assert table.column_names == [name for name, _ in COLUMNS]
+    assert table.num_rows == 3
+    rows = table.to_pylist()
+    assert rows[0]["id"] == 1
+    assert rows[0]["name"] == "Acme"
+    assert rows[0]["price"] == "9.50"
+    assert rows[0]["scraped_at"] == datetime(2024, 5, 1, 12, 30)
+    assert json.loads(rows[0]["details"]) == {"phone": None, "open": True}
+    assert json.loads(rows[0]["tags"]) == ["b2b", "saas"]
+    assert rows[1] == {"id": 2, "name": None, "price": None, "scraped_at": None, "details": None, "tags": None}
+    assert json.loads(rows[2]["details"]) == [1, "two"]
+    assert json.loads(rows[2]["tags"]) == []
+
+
+def test_csv_writes_json_columns_as_json_like_ndjson():
+    rows = [(1, "Acme", Decimal("9.50"), datetime(2024, 5, 1), {"phone": None, "open": True}, ["b2b"]),
+            (2, None, None, None, None, None)]
+    text = b"".join(csv_chunks(COLUMNS, iter([rows]))).decode("utf-8")
+    records = list(csv.DictReader(io.StringIO(text)))
+    ndjson = [json.loads(line) for line in b"".join(ndjson_chunks([n for n, _ in COLUMNS], iter([rows]))).splitlines()]
+
+    assert json.loads(records[0]["details"]) == ndjson[0]["details"] == {"phone": None, "open": True}
+    assert json.loads(records[0]["tags"]) == ndjson[0]["tags"] == ["b2b"]
+    assert records[0]["name"] == "Acme"
+    assert records[1]["details"] == "" and records[1]["tags"] == ""
@@ -0,0 +1,116 @@
+from datetime import date
+from decimal import Decimal
+import pytest
+from psycopg2 import sql
+from entity_query import RowsQuery, encode_cursor, typed_value
+
+COLUMNS = [("id", "integer"), ("name", "text"), ("city", "text")]
+
+
+def test_cursor_continues_the_same_sort():
+    first = RowsQuery("leads", COLUMNS, {"name"}, sort="-name", limit=1)
+    first.build()
+    page = first.page([(7, "Globex", "Berlin"), (3, "Acme", "Paris")])
+    assert page["has_more"]
+
+    following = RowsQuery("leads", COLUMNS, {"name"}, sort="-name", cursor=page["next_cursor"])
+    assert following.after == ["Globex", 7]
+
+
+@pytest.mark.parametrize("sort", [None, "name", "-id"])
+def test_cursor_from_another_sort_is_rejected(sort):
+    first = RowsQuery("leads", COLUMNS, {"name"}, sort="-name", limit=1)
+    first.build()
+    cursor = first.page([(7, "Globex", "Berlin"), (3, "Acme", "Paris")])["next_cursor"]
+    with pytest.raises(ValueError):
+        RowsQuery("leads", COLUMNS, {"name"}, sort=sort, cursor=cursor)
+
+
+def test_sorting_needs_an_indexed_column():
+    with pytest.raises(ValueError):
+        RowsQuery("leads", COLUMNS, {"name"}, sort="city")
+
+
+def _render(composable) -> str:
+    """The query text without a connection: identifiers double-quoted, placeholders kept."""
+    if isinstance(composable, sql.Composed):
+        return "".join(_render(part) for part in composable.seq)
+    if isinstance(composable, sql.Identifier):
+        return ".".join(f'"{s}"' for s in composable.strings)
+    if isinstance(composable, sql.SQL):
+        return composable.string
+    raise TypeError(type(composable))
+
+
+def _build(**kwargs):
+    query = RowsQuery("leads", COLUMNS + [("employees", "integer")], {"name"}, **kwargs)
+    statement, params = query.build()
+    return _render(statement), params
+
+
+def test_first_page_sorts_by_id():
+    statement, params = _build(limit=10)
+    assert statement == 'SELECT "id", "name", "city", "employees" FROM "leads" ORDER BY id ASC LIMIT %s'
+    assert params == [11]
+
+
+def test_keyset_on_id():
+    statement, params = _build(sort="-id", cursor=encode_cursor("-id", [42, 42]), limit=10)
+    assert statement.endswith('WHERE "id" < %s ORDER BY id DESC LIMIT %s')
+    assert params == [42, 11]
+
+
+def test_keyset_on_an_indexed_column_keeps_the_null_tail():
+    statement, params = _build(sort="name", cursor=encode_cursor("name", ["Acme", 3]), limit=10)
+    assert 'WHERE (("name", "id") > (%s, %s) OR "name" IS NULL)' in statement
+    assert statement.endswith('ORDER BY "name" ASC NULLS LAST, id ASC LIMIT %s')
+    assert params == ["Acme", 3, 11]
+
+
+def test_descending_keyset_compares_rows_downwards():
+    statement, params = _build(sort="-name", cursor=encode_cursor("-name", ["Globex", 7]), limit=10)
+    assert 'WHERE (("name", "id") < (%s, %s) OR "name" IS NULL)' in statement
+    assert statement.endswith('ORDER BY "name" DESC NULLS LAST, id DESC LIMIT %s')
+    assert params == ["Globex", 7, 11]
+
+
+def test_keyset_inside_the_null_tail():
+    statement, params = _build(sort="name", cursor=encode_cursor("name", [None, 9]), limit=10)
+    assert 'WHERE ("name" IS NULL AND "id" > %s)' in statement
+    assert params == [9, 11]
+
+
+def test_filters_are_typed_and_combined_with_the_keyset():
+    statement, params = _build(
+        select="name",
+        filters=["employees:gte:10", "id:in:1,2,3", "city:contains:50%_off", "name:startswith:Ac", "city:notnull"],
+        sort="name", cursor=encode_cursor("name", ["Acme", 3]), limit=5)
+    assert statement == (
+        'SELECT "name", "id" FROM "leads" WHERE "employees" >= %s AND "id" = ANY(%s)'
+        ' AND "city"::text ILIKE %s AND "name"::text ILIKE %s AND "city" IS NOT NULL'
+        ' AND (("name", "id") > (%s, %s) OR "name" IS NULL)'
+        ' ORDER BY "name" ASC NULLS LAST, id ASC LIMIT %s'
+    )
+    assert params == [10, [1, 2, 3], "%50\\%\\_off%", "Ac%", "Acme", 3, 6]
+
+
+@pytest.mark.parametrize("expression", [
+    "employees:eq:many",       # not an integer
+    "id:in:1,two",
+    "employees:between:1",     # unknown operator
+    "employees:eq",            # missing value
+    "revenue:eq:1",            # unknown column
+])
+def test_invalid_filters_are_rejected(expression):
+    with pytest.raises(ValueError):
+        _build(filters=[expression])
+
+
+def test_typed_value_parses_column_types():
+    assert typed_value("boolean", "yes") is True
+    assert typed_value("numeric", "9.50") == Decimal("9.50")
+    assert typed_value("date", "2024-05-01") == date(2024, 5, 1)
+    with pytest.raises(ValueError):
+        typed_value("boolean", "maybe")
+    with pytest.raises(ValueError):
+        typed_value("numeric", "lots")
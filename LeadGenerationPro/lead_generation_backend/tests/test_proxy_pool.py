@@ -0,0 +1,95 @@
+import asyncio
+import socket
+from urllib.parse import urlsplit
+from aiohttp import web
+import utils
+from proxy_pool import ProxyPool
+import robots
+from robots import RobotsCache, RobotsRules
+from utils import close_http_session, fetch_html
+
+PAGE = "<html><body><div class='lead'>Acme</div></body></html>"
+
+
+def test_hosts_stick_to_one_proxy():
+    pool = ProxyPool(["http://p1:1", "http://p2:2", "http://p3:3"])
+    first = pool.acquire("https://example.com/a")
+    assert all(pool.acquire("https://example.com/b") is first for _ in range(20))
+
+
+def test_failing_proxy_is_evicted_and_its_hosts_move():
+    pool = ProxyPool(["http://p1:1", "http://p2:2"], max_consecutive_failures=2)
+    proxy = pool.acquire("https://example.com/")
+    pool.record_failure(proxy)
+    assert proxy.healthy
+    pool.record_failure(proxy)
+    assert not proxy.healthy
+    assert pool.acquire("https://example.com/") is not proxy
+
+
+def test_success_rate_and_latency_update_the_score():
+    pool = ProxyPool(["http://p1:1"])
+    proxy = pool.acquire("https://example.com/")
+    before = proxy.score
+    pool.record_success(proxy, 0.05)
+    assert proxy.score > before
+    assert proxy.samples == 1
+
+
+def _closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _serve(handler):
+    """A local stand-in proxy: answers forwarded requests itself."""
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def test_fetch_fails_over_to_a_healthy_local_proxy(monkeypatch):
+    async def run():
+        seen = []
+
+        async def good(request):
+            seen.append(str(request.url))
+            return web.Response(text=PAGE, content_type="text/html")
+
+        async def bad_gateway(request):
+            return web.Response(status=502)
+
+        good_runner, good_url = await _serve(good)
+        bad_runner, bad_url = await _serve(bad_gateway)
+        dead_url = f"http://127.0.0.1:{_closed_port()}"
+        target = f"http://leads.test:{_closed_port()}/companies"
+        try:
+            pool = ProxyPool([dead_url, bad_url, good_url], max_consecutive_failures=1)
+            monkeypatch.setattr(utils, "proxy_pool", pool)
+            # A throwaway robots cache, so the permissive rules don't outlive this test
+            test_robots = RobotsCache()
+            test_robots.store(f"http://{urlsplit(target).netloc}", RobotsRules(), 60)
+            monkeypatch.setattr(robots, "robots_cache", test_robots)
+            # Start on the dead proxy: every failed attempt must evict it and move on
+            pool._assignments[urlsplit(target).netloc] = pool.proxies[0]
+
+            html = await fetch_html(target, timeout=5)
+
+            dead, bad, healthy = pool.proxies
+            assert "Acme" in html
+            assert seen and seen[-1].endswith("/companies")
+            assert not dead.healthy
+            assert healthy.samples >= 1 and healthy.consecutive_failures == 0
+            assert pool.acquire(target) is healthy
+        finally:
+            await close_http_session()
+            await good_runner.cleanup()
+            await bad_runner.cleanup()
+
+    asyncio.run(run())
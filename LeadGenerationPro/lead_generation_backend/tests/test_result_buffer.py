@@ -0,0 +1,27 @@
+import pytest
+from result_buffer import ColumnarRows, as_columnar
+
+
+def test_short_rows_are_padded_after_add_column():
+    rows = ColumnarRows(["name"])
+    rows.append_values(["Acme"])
+    rows[0]["email"] = "sales@acme.com"   # adds the column through a RowView
+    rows.append_values(["Globex"])
+
+    assert [len(rows.column(name)) for name in rows.column_names] == [2, 2]
+    assert rows.to_dicts() == [{"name": "Acme", "email": "sales@acme.com"}, {"name": "Globex"}]
+    with pytest.raises(ValueError):
+        rows.append_values(["Initech", "a@b.c", "extra"])
+
+
+def test_take_and_copy_stream():
+    rows = as_columnar([{"name": "Acme", "phone": ""}, {"name": "Glo\tbex", "phone": 0}, {"name": "Initech"}])
+    taken = rows.take([2, 1])
+    assert taken.to_dicts() == [{"name": "Initech"}, {"name": "Glo\tbex", "phone": 0}]
+    expected = "Acme\t\\N\nGlo\\tbex\t0\nInitech\t\\N\n"
+    assert rows.copy_stream(["name", "phone"]).read() == expected
+
+    # psycopg2 reads in fixed-size pieces while rows are still being encoded
+    stream = rows.copy_stream(["name", "phone"], rows_per_chunk=1)
+    pieces = iter(lambda: stream.read(5), "")
+    assert "".join(pieces) == expected
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from retry import CircuitBreaker, CircuitOpenError, RetryPolicy, RetryableError, call_with_retries
+
+URL = "https://example.com/page"
+HOST = "example.com"
+
+
+def _open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure(HOST)
+    return breaker
+
+
+def test_errors_raised_before_the_request_leave_the_breaker_open():
+    breaker = _open_breaker()
+
+    async def blocked_by_robots():
+        raise PermissionError("Blocked by robots.txt")
+
+    with pytest.raises(PermissionError):
+        asyncio.run(call_with_retries(URL, blocked_by_robots, RetryPolicy(attempts=1), breaker))
+    # The trial was released, but nothing proved the host healthy
+    assert breaker.state(HOST) == "half-open"
+    assert breaker.before_request(HOST) is True
+
+
+def test_a_response_closes_the_breaker():
+    breaker = _open_breaker()
+
+    async def ok():
+        return "html"
+
+    assert asyncio.run(call_with_retries(URL, ok, RetryPolicy(attempts=1), breaker)) == "html"
+    assert breaker.state(HOST) == "closed"
+
+
+def test_transient_failures_are_retried_then_open_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    calls = []
+
+    async def unavailable():
+        calls.append(1)
+        raise RetryableError("503 Service Unavailable")
+
+    with pytest.raises(RetryableError):
+        asyncio.run(call_with_retries(URL, unavailable, RetryPolicy(attempts=3, base_delay=0), breaker))
+    assert len(calls) == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request(HOST)
@@ -0,0 +1,254 @@
+import os
+import math
+import sqlite3
+import hashlib
+import threading
+from typing import List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from data_dir import data_path
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid", "igshid",
+    "_ga", "_gl", "ref", "ref_src", "spm", "sessionid", "phpsessid", "jsessionid"
+}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+FRONTIER_DIR = data_path(os.getenv("FRONTIER_DIR", "frontier"))
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so trivially different spellings of the same page compare equal.
+    The result is a dedupe key only - tracking params are dropped and the query re-encoded,
+    so pages are always fetched from the URL as found.
+    """
+    parts = urlsplit(str(url).strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower().rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"   # IPv6 literal
+    port = parts.port
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username if parts.password is None else f"{parts.username}:{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over a bytearray, using double hashing."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str):
+        for p in self._positions(item):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows by stacking filters of increasing size and tighter error rate,
+    so the overall false-positive rate stays bounded without knowing the final size up front.
+    """
+
+    def __init__(self, initial_capacity: int = 100_000, error_rate: float = 0.001,
+                 growth: int = 4, tightening: float = 0.5):
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = [BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in f for f in self.filters)
+
+    def add(self, item: str):
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(
+                current.capacity * self.growth,
+                current.error_rate * self.tightening
+            )
+            self.filters.append(current)
+        current.add(item)
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(len(f.bits) for f in self.filters)
+
+
+class URLFrontier:
+    """
+    Set of URLs queued or fetched by a crawl.
+
+    Lookups hit an in-memory scalable Bloom filter first; only possible hits are confirmed
+    against the exact set kept on disk (SQLite), so memory stays bounded for tens of
+    millions of URLs. Queued URLs also live on disk until they are popped. URLs are keyed
+    by their canonical form; queued ones come back as they were pushed, ready to fetch.
+    """
+
+    def __init__(self, path: str, initial_capacity: int = 100_000, error_rate: float = 0.001):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                fetched INTEGER NOT NULL DEFAULT 0,
+                fetch_url TEXT
+            )
+        """)
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._bloom = ScalableBloomFilter(initial_capacity, error_rate)
+        for (url,) in self._db.execute("SELECT url FROM urls"):
+            self._bloom.add(url)
+
+    def _exists(self, url: str) -> bool:
+        if url not in self._bloom:
+            return False
+        return self._db.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone() is not None
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return self._exists(canonicalize_url(url))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def push(self, url: str) -> bool:
+        """Queue a URL for fetching. Returns False if it was already queued or fetched."""
+        key = canonicalize_url(url)
+        with self._lock:
+            if self._exists(key):
+                return False
+            self._db.execute("INSERT OR IGNORE INTO urls (url, fetched, fetch_url) VALUES (?, 0, ?)", (key, url))
+            self._db.commit()
+            self._bloom.add(key)
+            return True
+
+    def requeue(self, url: str):
+        """Queue a URL again even if it was fetched before (e.g. its page changed)."""
+        key = canonicalize_url(url)
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO urls (url, fetched, fetch_url) VALUES (?, 0, ?)
+                ON CONFLICT (url) DO UPDATE SET fetched = 0, fetch_url = EXCLUDED.fetch_url
+            """, (key, url))
+            self._db.commit()
+            self._bloom.add(key)
+
+    def add(self, url: str):
+        """Record a URL as fetched (queued or not)."""
+        url = canonicalize_url(url)
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO urls (url, fetched) VALUES (?, 1)
+                ON CONFLICT (url) DO UPDATE SET fetched = 1
+            """, (url,))
+            self._db.commit()
+            self._bloom.add(url)
+
+    def add_many(self, urls):
+        """Record many URLs as fetched in one transaction."""
+        urls = [canonicalize_url(url) for url in urls]
+        with self._lock:
+            self._db.executemany("""
+                INSERT INTO urls (url, fetched) VALUES (?, 1)
+                ON CONFLICT (url) DO UPDATE SET fetched = 1
+            """, [(url,) for url in urls])
+            self._db.commit()
+            for url in urls:
+                self._bloom.add(url)
+
+    def peek(self, limit: int = 100) -> List[str]:
+        """Return up to `limit` queued URLs without taking them; add_many() acknowledges them."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT COALESCE(fetch_url, url) FROM urls WHERE fetched = 0 ORDER BY rowid LIMIT ?", (limit,)
+            ).fetchall()
+            return [row[0] for row in rows]
+
+    def pop(self, limit: int = 100) -> List[str]:
+        """Return up to `limit` queued URLs, marking them fetched."""
+        urls = self.peek(limit)
+        self.add_many(urls)
+        return urls
+
+    def run(self) -> "FrontierRun":
+        return FrontierRun(self)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class FrontierRun:
+    """
+    A crawl run's view of a frontier: URLs it fetches are only written to the frontier
+    on commit(), so a run that fails before saving its rows fetches them again next time.
+    """
+
+    def __init__(self, frontier: URLFrontier):
+        self.frontier = frontier
+        self.fetched = set()
+        self._since_savepoint = set()
+
+    def __contains__(self, url: str) -> bool:
+        return canonicalize_url(url) in self.fetched or url in self.frontier
+
+    def add(self, url: str):
+        url = canonicalize_url(url)
+        if url not in self.fetched:
+            self.fetched.add(url)
+            self._since_savepoint.add(url)
+
+    def savepoint(self):
+        """Mark a point rollback() can return to, alongside a database SAVEPOINT."""
+        self._since_savepoint = set()
+
+    def rollback(self):
+        """Forget URLs fetched since the savepoint: the rows they filled in were rolled back."""
+        self.fetched -= self._since_savepoint
+        self._since_savepoint = set()
+
+    def commit(self):
+        self.frontier.add_many(self.fetched)
+
+
+_frontiers = {}
+_frontiers_lock = threading.Lock()
+
+
+def get_frontier(name: str, directory: Optional[str] = None) -> URLFrontier:
+    """Return the process-wide frontier for a crawl (e.g. one entity's detail pages)."""
+    with _frontiers_lock:
+        frontier = _frontiers.get(name)
+        if frontier is None:
+            safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+            frontier = URLFrontier(os.path.join(directory or FRONTIER_DIR, f"{safe_name}.sqlite3"))
+            _frontiers[name] = frontier
+        return frontier
@@ -1,8 +1,126 @@
+import os
 import re
+import json
+import time
+import asyncio
+import weakref
 from bs4 import BeautifulSoup
 import aiohttp
+import httpx
 from fastapi import HTTPException
 from datetime import datetime
+from typing import Any, List
+from robots import polite_wait
+from charset import decode_body
+from retry import call_with_retries, is_transient, RetryableError, CircuitOpenError, RETRYABLE_STATUSES, parse_retry_after
+from proxy_pool import proxy_pool
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# One pooled session per event loop (uvicorn's loop, or the loop asyncio.run creates for dynamic scrapes)
+_sessions = weakref.WeakKeyDictionary()
+_http2_clients = weakref.WeakKeyDictionary()   # loop -> {proxy url or None: client}; httpx binds proxies per client
+
+# Statuses that mean the egress IP itself was refused, so they count against the proxy's health
+PROXY_BLOCK_STATUSES = {403, 407}
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2]); FETCH_HTTP2=false forces HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+USE_HTTP2 = HTTP2_AVAILABLE and os.getenv("FETCH_HTTP2", "true").lower() in ("1", "true", "yes")
+
+# Response limits for page fetches; sources can only lower the size cap (sources.max_response_bytes)
+MAX_RESPONSE_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(10 * 1024 * 1024)))
+ALLOWED_CONTENT_TYPES = {
+    t.strip().lower() for t in os.getenv(
+        "FETCH_ALLOWED_TYPES", "text/html,application/xhtml+xml,text/plain,text/xml,application/xml"
+    ).split(",") if t.strip()
+}
+READ_CHUNK_SIZE = 64 * 1024
+
+class ResponseRejected(Exception):
+    """The page was refused before or while reading its body (too large, wrong content type)."""
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+def check_response_headers(url: str, headers, max_bytes: int):
+    """Reject a response from its headers alone, before reading any of the body"""
+    content_type = (headers.get('Content-Type') or '').split(';', 1)[0].strip().lower()
+    if content_type and ALLOWED_CONTENT_TYPES and content_type not in ALLOWED_CONTENT_TYPES:
+        raise ResponseRejected(f"Unsupported content type '{content_type}' for {url}", 415)
+    length = headers.get('Content-Length')
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise ResponseRejected(f"Response of {length} bytes exceeds the {max_bytes} byte limit for {url}", 413)
+
+async def read_capped(chunks, url: str, max_bytes: int) -> bytes:
+    """Accumulate body chunks, aborting as soon as the size cap is exceeded"""
+    body = bytearray()
+    async for chunk in chunks:
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise ResponseRejected(f"Response exceeds the {max_bytes} byte limit for {url}", 413)
+    return bytes(body)
+
+_TOKEN = re.compile(r"\.([A-Za-z_][\w-]*)|\[(\d+|\*)\]|\['([^']*)'\]|\[\"([^\"]*)\"\]|\.\*")
+
+def parse_jsonpath(path: str) -> List[Any]:
+    """Split a JSONPath subset ($.a.b, $.items[0], $.items[*].name, $['a b']) into steps."""
+    path = (path or "$").strip()
+    if not path.startswith("$"):
+        path = "$." + path
+    steps = []
+    pos = 1
+    while pos < len(path):
+        match = _TOKEN.match(path, pos)
+        if not match:
+            raise ValueError(f"Unsupported JSONPath: {path}")
+        key, index, quoted, dquoted = match.groups()
+        if key is not None:
+            steps.append(key)
+        elif index is not None:
+            steps.append("*" if index == "*" else int(index))
+        elif quoted is not None or dquoted is not None:
+            steps.append(quoted if quoted is not None else dquoted)
+        else:
+            steps.append("*")
+        pos = match.end()
+    return steps
+
+def jsonpath_values(data: Any, path: str) -> List[Any]:
+    """Return every value matched by a JSONPath subset expression."""
+    current = [data]
+    for step in parse_jsonpath(path):
+        matched = []
+        for node in current:
+            if step == "*":
+                if isinstance(node, list):
+                    matched.extend(node)
+                elif isinstance(node, dict):
+                    matched.extend(node.values())
+            elif isinstance(step, int):
+                if isinstance(node, list) and -len(node) <= step < len(node):
+                    matched.append(node[step])
+            elif isinstance(node, dict) and step in node:
+                matched.append(node[step])
+        current = matched
+    return current
+
+def jsonpath_first(data: Any, path: str) -> str:
+    """Return the first matched value as a string ('' when nothing matches)."""
+    values = jsonpath_values(data, path)
+    if not values or values[0] is None:
+        return ''
+    value = values[0]
+    if isinstance(value, (dict, list)):
+        return ''
+    return str(value).strip()
+
 def extract_value(element, extract_type: str) -> str:
     """Extract value from BeautifulSoup element based on extract type"""
     if not element:
@@ -14,21 +132,153 @@ def extract_value(element, extract_type: str) -> str:
         return element.get('src', '')
     elif extract_type == 'text':
         return re.sub(r'\s+', ' ', element.get_text()).strip()
+    elif extract_type == 'jsonld':
+        # A <script type="application/ld+json"> block, returned as compact JSON
+        try:
+            return json.dumps(json.loads(element.get_text()), separators=(',', ':'))
+        except ValueError:
+            return ''
     else:
         # Treat as attribute name
         return element.get(extract_type, '')
 
-async def fetch_page(url: str, timeout: int = 15) -> BeautifulSoup:
-    """Asynchronously fetch and parse a web page"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    async with aiohttp.ClientSession(headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+def is_structured_field(mapping) -> bool:
+    """jsonld fields with a JSONPath selector read from the page's schema.org item, not the DOM"""
+    return mapping.extract == 'jsonld' and mapping.selector.strip().startswith('$')
+
+def extract_values(scope, field_mappings, structured_item: dict = None) -> list:
+    """Extract one row's field values, in field_mappings order, from a container element (or whole page)"""
+    values = []
+    for mapping in field_mappings.values():
+        if is_structured_field(mapping):
+            values.append(jsonpath_first(structured_item, mapping.selector) if structured_item else '')
+            continue
+        element = scope.select_one(mapping.selector) if scope is not None else None
+        values.append(extract_value(element, mapping.extract))
+    return values
+
+def extract_row(scope, field_mappings, structured_item: dict = None) -> dict:
+    """Extract one row of fields from a container element (or whole page)"""
+    return dict(zip(field_mappings, extract_values(scope, field_mappings, structured_item)))
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Return the pooled HTTP session for the running event loop"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            headers=DEFAULT_HEADERS,
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=10)
+        )
+        _sessions[loop] = session
+    return session
+
+def get_http2_client(proxy: str = None) -> httpx.AsyncClient:
+    """
+    Return the pooled HTTP/2 client for the running event loop (one per proxy).
+    Requests to one host are multiplexed over a single connection, and httpx advertises
+    every encoding it can decode (br with brotli installed, zstd with zstandard).
+    """
+    loop = asyncio.get_running_loop()
+    clients = _http2_clients.setdefault(loop, {})
+    client = clients.get(proxy)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=True,
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+            proxy=proxy,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+        clients[proxy] = client
+    return client
+
+async def close_http_session():
+    """Close the pooled HTTP session (and HTTP/2 client) of the running event loop, if any"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+    for client in _http2_clients.pop(loop, {}).values():
+        if not client.is_closed:
+            await client.aclose()
+
+def is_proxy_failure(error: Exception) -> bool:
+    """Errors that reflect on the egress proxy: transient failures, throttling and IP blocks"""
+    if is_transient(error):
+        return True
+    status = getattr(error, 'status', None)
+    if status is None and isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    return status in PROXY_BLOCK_STATUSES
+
+async def fetch_html(url: str, timeout: int = 15, max_bytes: int = None) -> str:
+    """Asynchronously fetch a web page and return its HTML without parsing it.
+    The body is streamed and the read aborts once it exceeds max_bytes; it is then decoded
+    exactly once (see charset.decode_body), so the parser gets a ready string.
+    max_bytes can only lower the FETCH_MAX_BYTES cap, never raise it."""
+    session = get_http_session()
+    max_bytes = min(max_bytes or MAX_RESPONSE_BYTES, MAX_RESPONSE_BYTES)
+
+    async def read_http2(proxy_url):
+        async with get_http2_client(proxy_url).stream('GET', str(url), timeout=timeout) as response:
+            if response.status_code in RETRYABLE_STATUSES:
+                raise RetryableError(
+                    f"{response.status_code} {response.reason_phrase}",
+                    parse_retry_after(response.headers.get('Retry-After'))
+                )
+            response.raise_for_status()
+            check_response_headers(url, response.headers, max_bytes)
+            body = await read_capped(response.aiter_bytes(READ_CHUNK_SIZE), url, max_bytes)
+            return decode_body(body, response.headers.get('Content-Type'))
+
+    async def read_http1(proxy_url):
+        async with session.get(str(url), proxy=proxy_url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status in RETRYABLE_STATUSES:
+                raise RetryableError(
+                    f"{response.status} {response.reason}",
+                    parse_retry_after(response.headers.get('Retry-After'))
+                )
+            response.raise_for_status()
+            check_response_headers(url, response.headers, max_bytes)
+            body = await read_capped(response.content.iter_chunked(READ_CHUNK_SIZE), url, max_bytes)
+            return decode_body(body, response.headers.get('Content-Type'))
+
+    async def attempt():
+        await polite_wait(url, session)
+        # Acquired per attempt, so a retry after an eviction moves to another proxy
+        proxy = proxy_pool.acquire(url)
+        proxy_url = proxy.url if proxy else None
+        started = time.monotonic()
         try:
-            async with session.get(str(url)) as response:
-                response.raise_for_status()
-                content = await response.text()
-                return BeautifulSoup(content, 'html.parser')
+            html = await (read_http2(proxy_url) if USE_HTTP2 else read_http1(proxy_url))
         except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Failed to fetch page: {str(e)}")
+            if is_proxy_failure(e):
+                proxy_pool.record_failure(proxy)
+            raise
+        proxy_pool.record_success(proxy, time.monotonic() - started)
+        return html
+
+    try:
+        return await call_with_retries(url, attempt)
+    except Exception as e:
+        raise fetch_error(e, timeout) from e
+
+def fetch_error(error: Exception, timeout: int, action: str = "Failed to fetch page") -> HTTPException:
+    """The HTTP error a failed fetch is reported as: 403 for robots.txt, 5xx for upstream trouble."""
+    if isinstance(error, PermissionError):
+        return HTTPException(status_code=403, detail=str(error))
+    if isinstance(error, ResponseRejected):
+        return HTTPException(status_code=error.status_code, detail=f"{action}: {str(error)}")
+    if isinstance(error, CircuitOpenError):
+        return HTTPException(status_code=503, detail=f"{action}: {str(error)}")
+    if isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException)):
+        return HTTPException(status_code=504, detail=f"{action}: timed out after {timeout}s")
+    if isinstance(error, (RetryableError, aiohttp.ClientConnectionError, httpx.TransportError)):
+        return HTTPException(status_code=502, detail=f"{action}: {str(error)}")
+    return HTTPException(status_code=400, detail=f"{action}: {str(error)}")
+
+async def fetch_page(url: str, timeout: int = 15, max_bytes: int = None) -> BeautifulSoup:
+    """Asynchronously fetch and parse a web page"""
+    content = await fetch_html(url, timeout, max_bytes)
+    return BeautifulSoup(content, 'html.parser')
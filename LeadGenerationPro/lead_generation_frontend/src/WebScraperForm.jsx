@@ -80,6 +80,11 @@ const WebScraperForm = () => {
     );
   };
 
+  const API_BASE = 'http://127.0.0.1:8000';
+  const JOB_POLL_INTERVAL_MS = 2000;
+  const JOB_POLL_MAX_ERRORS = 5;
+
+  // Long scrapes run as background jobs; rows are streamed in over server-sent events
   const scrapeWebsite = async (endpoint) => {
     setLoading(true);
     setResponse(null);
@@ -87,24 +92,96 @@ const WebScraperForm = () => {
     try {
       const request = createScrapeRequest();
       
-      const response = await fetch(`http://127.0.0.1:8000/scrape${endpoint}`, {
+      const submitted = await fetch(`${API_BASE}/jobs`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify(request)
+        body: JSON.stringify({ mode: endpoint, request })
       });
 
-      const data = await response.json();
-      setResponse({ ...data, endpoint });
+      const job = await submitted.json();
+      if (!submitted.ok) {
+        throw new Error(job.detail || 'Failed to start scraping job');
+      }
+
+      setResponse({ ...job, success: true, data: [], endpoint });
       setActiveTab('results');
+
+      // Rows received so far, so a fallback poll picks up exactly where the stream stopped
+      let received = 0;
+
+      // Poll the job until it reaches a terminal status; a few failed polls in a row give up
+      const pollJob = async () => {
+        let errors = 0;
+        try {
+          while (true) {
+            try {
+              const res = await fetch(`${API_BASE}/jobs/${job.job_id}?offset=${received}`);
+              const result = await res.json();
+              if (!res.ok) {
+                throw new Error(result.detail || 'Failed to fetch job status');
+              }
+              errors = 0;
+              received += result.data.length;
+              const finished = result.status === 'succeeded' || result.status === 'failed';
+              setResponse(prev => ({
+                ...prev,
+                ...result,
+                success: finished ? result.status === 'succeeded' : result.status !== 'failed',
+                data: [...prev.data, ...result.data],
+                total_items: prev.data.length + result.data.length,
+                endpoint
+              }));
+              if (finished) {
+                return;
+              }
+            } catch (error) {
+              errors += 1;
+              if (errors >= JOB_POLL_MAX_ERRORS) {
+                setResponse(prev => ({ ...prev, success: false, message: `Request failed: ${error.message}` }));
+                return;
+              }
+            }
+            await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+          }
+        } finally {
+          setLoading(false);
+        }
+      };
+
+      const events = new EventSource(`${API_BASE}/jobs/${job.job_id}/events`);
+
+      events.addEventListener('status', (e) => {
+        const status = JSON.parse(e.data);
+        setResponse(prev => ({ ...prev, ...status, success: status.status !== 'failed', data: prev.data }));
+      });
+
+      events.addEventListener('rows', (e) => {
+        const { offset, rows } = JSON.parse(e.data);
+        received = offset + rows.length;
+        setResponse(prev => ({ ...prev, data: [...prev.data, ...rows], total_items: prev.data.length + rows.length }));
+      });
+
+      events.addEventListener('done', (e) => {
+        const status = JSON.parse(e.data);
+        setResponse(prev => ({ ...prev, ...status, success: status.status === 'succeeded', data: prev.data }));
+        events.close();
+        setLoading(false);
+      });
+
+      events.onerror = () => {
+        // The stream dropped. A reconnect would replay every row from the start, so switch to
+        // polling the job from the rows already received until it has really finished
+        events.close();
+        pollJob();
+      };
     } catch (error) {
       setResponse({
         success: false,
         message: `Request failed: ${error.message}`,
         endpoint
       });
-    } finally {
       setLoading(false);
     }
   };